@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+
+from cachetools import LRUCache
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.src.api.queries import apply_filters
+from app.src.cache import cache_key
+from app.src.conflicts import DEFAULT_DURATION_MINUTES
+from app.src.conditional import etag_for, is_not_modified, validator_headers
+from app.src.db.database import get_db
+from app.src.db.models import Event
+from app.src.db.schemas import EventFilters
+from app.src.metrics import cache_requests_total
+
+# iCalendar feeds of valid, hot-table events. Rendered bodies are cached per
+# write generation, so calendar clients polling an unchanged feed cost one
+# dict lookup (or a 304) instead of a query and a render.
+
+router = APIRouter(prefix="/calendar", tags=["calendar"])
+
+feed_cache = LRUCache(maxsize=128)
+
+ICS_MEDIA_TYPE = "text/calendar; charset=utf-8"
+
+
+def escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    # RFC 5545: content lines are folded at 75 octets, continuation lines
+    # start with a single space
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+
+    parts, current = [], b""
+    for char in line:
+        char_bytes = char.encode()
+        if len(current) + len(char_bytes) > (75 if not parts else 74):
+            parts.append(current.decode())
+            current = b""
+        current += char_bytes
+    parts.append(current.decode())
+    return "\r\n ".join(parts)
+
+
+def ics_local(dt: datetime) -> str:
+    # Scraped times are naive local times, so they are emitted as floating
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def ics_utc(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_calendar(name: str, events) -> bytes:
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//python-db-events//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(name)}",
+    ]
+
+    for event in events:
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:event-{event.id}@python-db-events",
+            f"DTSTAMP:{ics_utc(event.updated_at or event.created_at or datetime.now())}",
+            f"DTSTART:{ics_local(event.start_datetime)}",
+        ]
+        if event.end_datetime and event.end_datetime > event.start_datetime:
+            lines.append(f"DTEND:{ics_local(event.end_datetime)}")
+        elif event.end_datetime:
+            # RFC 5545 requires DTEND after DTSTART; a bad end gets the same
+            # default length the conflict index uses
+            lines.append(f"DURATION:PT{DEFAULT_DURATION_MINUTES}M")
+        lines.append(f"SUMMARY:{escape_text(event.title or '')}")
+        if event.event_link:
+            lines.append(f"URL:{event.event_link}")
+
+        description = " — ".join(filter(None, [event.organizer, event.note]))
+        if description:
+            lines.append(f"DESCRIPTION:{escape_text(description)}")
+        if event.industry:
+            lines.append(f"CATEGORIES:{escape_text(event.industry)}")
+        if event.market:
+            lines.append(f"LOCATION:{escape_text(event.market)}")
+        lines.append("END:VEVENT")
+
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(fold_line(line) for line in lines) + "\r\n").encode()
+
+
+async def calendar_feed(request: Request, db: AsyncSession, field: str, value: str) -> Response:
+    key = cache_key("ics", field, value)
+    etag = etag_for(key)
+    headers = validator_headers(etag)
+
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    body = feed_cache.get(key)
+    cache_requests_total.inc("ics", "miss" if body is None else "hit")
+    if body is None:
+        filters = EventFilters(**{field: [value]})
+        result = await db.execute(
+            apply_filters(select(Event), Event, filters)
+            .where(Event.start_datetime.is_not(None))
+            .order_by(Event.start_datetime)
+        )
+        body = feed_cache.setdefault(key, render_calendar(f"{value} events", result.scalars().all()))
+
+    return Response(content=body, media_type=ICS_MEDIA_TYPE, headers=headers)
+
+
+@router.get("/{market}.ics")
+async def market_calendar(market: str, request: Request, db: AsyncSession = Depends(get_db)):
+    return await calendar_feed(request, db, "market", market)
+
+
+@router.get("/organizer/{organizer}.ics")
+async def organizer_calendar(organizer: str, request: Request, db: AsyncSession = Depends(get_db)):
+    return await calendar_feed(request, db, "organizer", organizer)
+
+
+@router.get("/industry/{industry}.ics")
+async def industry_calendar(industry: str, request: Request, db: AsyncSession = Depends(get_db)):
+    return await calendar_feed(request, db, "industry", industry)
@@ -1,228 +1,667 @@
-from fastapi import FastAPI, Query, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Body, Depends, FastAPI, Query, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
-import importlib
-from app.src.utils import deduplicate_events, load_config
-from app.src.db.database import SessionLocal
-from app.src.db.schemas import EventResponse, EventUpdate, EventCreate
+import asyncio
+import csv
+import io
+from cachetools import LRUCache
+from app.src.broadcast import broadcaster, format_sse
+from app.src.cache import ResponseCache, cache_key
+from app.src.compression import CompressionMiddleware
+from app.src.ingest import refresh_site
+from app.src.conflicts import conflict_index, event_interval, naive_local
+from app.src.dedup import flag_duplicates
+from app.src import metrics
+from app.src.metrics import cache_requests_total, events_request_seconds, events_serialize_seconds
+from app.src.conditional import etag_for, is_not_modified, validator_headers
+from app.src.serialize import encoder_for
+from app.src.urls import canonical_event_url
+from app.src.utils import parse_time_param
+from app.src.api import calendar, scrapes, traces
+from app.src.api.queries import event_rows, filtered_events, get_fields, get_filters, sort_key
+from app.src.db.database import AsyncSessionLocal, follow_changes, get_db
+from app.src.db.schemas import (
+    EventResponse, EventUpdate, EventCreate, EventChangesResponse, EventFilters, EventFacetsResponse,
+    EventPatch, EventBulkResult, EventCalendarResponse, ConflictGroup,
+)
 from app.src.db.database import init_db
-from app.src.db.models import Event
+from app.src.db.changes import record_changes
+from app.src.db.models import Event, EventArchive, EventChange
+from app.src.db.dimensions import DIMENSIONS, assign_fields, dimension_id
+from app.src.db.archive import ARCHIVE_AFTER_DAYS, archive_loop, archive_past_events
 
-from sqlalchemy.orm import Session
-from sqlalchemy import asc, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import asc, delete, desc, func, literal, select, tuple_, union_all, update
+from sqlalchemy.exc import IntegrityError
 
 init_db()
 
-app = FastAPI()
 
-class EventRequest(BaseModel):
-    websites: List[str]
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    archiver = asyncio.create_task(archive_loop())
+    follower = asyncio.create_task(follow_changes())
+    yield
+    archiver.cancel()
+    follower.cancel()
 
-def parse_datetime(dt_input) -> datetime | None:
-    if isinstance(dt_input, datetime):
-        return dt_input
-    if isinstance(dt_input, str) and dt_input.strip():
-        try:
-            return datetime.fromisoformat(dt_input)
-        except Exception as ex:
-            print(f"[WARNING] Failed to parse datetime string: '{dt_input}' — {ex}")
-    return None
 
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
+app.include_router(calendar.router)
+app.include_router(scrapes.router)
+app.include_router(traces.router)
+
+class EventRequest(BaseModel):
+    websites: List[str]
 
 @app.post("/events", response_model=List[EventResponse])
 async def fetch_events(request: EventRequest):
-    all_events = []
+    stored_events = []
 
     for site in request.websites:
         try:
-            config = load_config(site)
-            module = importlib.import_module(f"app.site.{site}")
-            events_raw = module.process(config)
-            events = deduplicate_events(events_raw)
-            all_events.extend(events)
+            stored_events.extend(await refresh_site(site))
         except Exception as e:
             print(f"Error processing {site}: {e}")
 
-    db: Session = SessionLocal()
-    stored_events = []
-
-    try:
-        for e in all_events:
-            title = e.get("Event Title")
-            event_link = e.get("Event Link")
-            organizer = e.get("Organizer")
-
-            if not (title and event_link and organizer):
-                continue  # skip incomplete
-
-            existing = (
-                db.query(Event)
-                .filter_by(title=title, event_link=event_link, organizer=organizer)
-                .first()
-            )
-
-            start_dt = parse_datetime(e.get("start_dt"))
-            end_dt = parse_datetime(e.get("end_dt"))
-
-            if existing:
-                existing.start_datetime = start_dt
-                existing.end_datetime = end_dt
-                existing.updated_at = datetime.now()
-                stored_events.append(existing)
-            else:
-                new_event = Event(
-                    title=title,
-                    event_link=event_link,
-                    organizer=organizer,
-                    industry=e.get("Industry"),
-                    market=e.get("Market"),
-                    start_datetime=start_dt,
-                    end_datetime=end_dt,
-                    created_at=datetime.now(),
-                    updated_at=datetime.now(),
-                    valid=True,
-                )
-                db.add(new_event)
-                stored_events.append(new_event)
+    return stored_events
 
-        db.commit()
 
-        for ev in stored_events:
-            db.refresh(ev)
+events_cache = ResponseCache("events", maxsize=128)
+last_modified_cache = LRUCache(maxsize=4)
 
-        return stored_events
 
-    finally:
-        db.close()
+async def last_modified_at(db: AsyncSession) -> datetime | None:
+    # Newest updated_at, or the newest change-log entry so deletes and
+    # archiving also move it forward. Computed once per write generation.
+    key = cache_key("last_modified")
+    if key in last_modified_cache:
+        cache_requests_total.inc("last_modified", "hit")
+    else:
+        cache_requests_total.inc("last_modified", "miss")
+        result = await db.execute(
+            select(func.max(Event.updated_at), select(func.max(EventChange.changed_at)).scalar_subquery())
+        )
+        last_modified_cache[key] = max(filter(None, result.one()), default=None)
+    return last_modified_cache[key]
 
 
 @app.get("/events", response_model=List[EventResponse])
-def get_events(
-    search: Optional[str] = Query(None),
-    market: Optional[List[str]] = Query(None),
-    industry: Optional[List[str]] = Query(None),
-    organizer: Optional[List[str]] = Query(None),
-    valid: Optional[bool] = Query(True),
-    start_after: Optional[datetime] = Query(None),
-    start_before: Optional[datetime] = Query(None),
+async def get_events(
+    request: Request,
+    filters: EventFilters = Depends(get_filters),
+    fields: tuple = Depends(get_fields),
     sort: Optional[str] = Query("start_datetime"),
     order: Optional[str] = Query("asc"),
     limit: int = Query(1000000),
     offset: int = Query(0),
+    db: AsyncSession = Depends(get_db),
+):
+    # Labelled by which filters are set, not their values, to keep the
+    # number of series bounded
+    shape = ",".join(sorted(filters.model_dump(exclude_defaults=True))) or "none"
+    with events_request_seconds.time(shape):
+        if sort not in EventResponse.model_fields:
+            sort = "start_datetime"
+        order = "asc" if order == "asc" else "desc"
+        sort_func = asc if order == "asc" else desc
+
+        async def query_events() -> bytes:
+            # Plain Core rows encoded straight to JSON; no ORM objects or models
+            events = filtered_events(filters)
+            query = event_rows(events, fields)
+
+            # Sorting logic
+            query = query.order_by(sort_func(sort_key(events, sort)))
+
+            result = await db.execute(query.offset(offset).limit(limit))
+            rows = result.all()
+            with events_serialize_seconds.time():
+                return encoder_for(fields).encode_rows(rows)
+
+        key = cache_key(filters.model_dump_json(), fields, sort, order, limit, offset)
+        etag = etag_for(key)
+        last_modified = await last_modified_at(db)
+        headers = validator_headers(etag, last_modified)
+
+        # Answer revalidations before touching any rows
+        if is_not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+
+        body = await events_cache.get_or_compute(key, query_events)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "events.ndjson"),
+    "csv": ("text/csv; charset=utf-8", "events.csv"),
+}
+
+
+@app.get("/events/export")
+async def export_events(
+    format: str = Query("ndjson", description="ndjson or csv"),
+    filters: EventFilters = Depends(get_filters),
+    fields: tuple = Depends(get_fields),
+    sort: Optional[str] = Query("start_datetime"),
+    order: Optional[str] = Query("asc"),
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=422, detail=f"Unknown export format: {format}")
+    if sort not in EventResponse.model_fields:
+        sort = "start_datetime"
+    sort_func = asc if order == "asc" else desc
+
+    events = filtered_events(filters)
+    query = event_rows(events, fields).order_by(sort_func(sort_key(events, sort)))
+    encoder = encoder_for(fields)
+
+    async def stream_rows():
+        # The session lives inside the generator: a request-scoped dependency
+        # would be closed before the body is streamed
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(fields)
+                yield buffer.getvalue().encode()
+
+            async for rows in result.partitions():
+                if format == "ndjson":
+                    yield "".join([encoder.encode_row(row) + "\n" for row in rows]).encode()
+                else:
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerows([encoder.csv_row(row) for row in rows])
+                    yield buffer.getvalue().encode()
+
+    media_type, filename = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+FACET_FIELDS = ["market", "industry", "organizer", "attending"]
+facet_cache = LRUCache(maxsize=256)
+
+
+@app.get("/events/facets", response_model=EventFacetsResponse)
+async def get_event_facets(
+    filters: EventFilters = Depends(get_filters),
+    db: AsyncSession = Depends(get_db),
+):
+    key = cache_key(filters.model_dump_json())
+    facets = facet_cache.get(key)
+    if facets is not None:
+        cache_requests_total.inc("facets", "hit")
+        return facets
+    cache_requests_total.inc("facets", "miss")
+
+    counts = []
+    for field in FACET_FIELDS:
+        # Each facet ignores its own filter so the UI can still offer the
+        # other values of a dimension once one is selected
+        own_filter = {field: None} if field in EventFilters.model_fields else {}
+        events = filtered_events(filters.model_copy(update=own_filter))
+
+        if field in DIMENSIONS:
+            # Group on the integer key and look the name up once per group
+            dimension = DIMENSIONS[field]
+            id_column = events.c[f"{field}_id"]
+            counts.append(
+                select(literal(field).label("facet"), dimension.name.label("value"), func.count().label("count"))
+                .select_from(events)
+                .outerjoin(dimension, dimension.id == id_column)
+                .group_by(id_column)
+            )
+        else:
+            column = events.c[field]
+            counts.append(
+                select(literal(field).label("facet"), column.label("value"), func.count().label("count"))
+                .group_by(column)
+            )
+
+    result = await db.execute(union_all(*counts))
+
+    facets = {field: [] for field in FACET_FIELDS}
+    for row in result:
+        facets[row.facet].append({"value": row.value, "count": row.count})
+    for values in facets.values():
+        values.sort(key=lambda f: -f["count"])
+
+    facet_cache[key] = facets
+    return facets
+
+
+CALENDAR_BUCKETS = {
+    "day": lambda start: func.date(start),
+    "week": lambda start: func.date(start, "-6 days", "weekday 1"),  # Monday of the week
+}
+calendar_cache = ResponseCache("calendar", maxsize=64)
+
+
+# Month/week views: counts and a few summaries per bucket, grouped in SQL so
+# the payload stays small however many events match
+@app.get("/events/calendar", response_model=EventCalendarResponse)
+async def get_event_calendar(
+    request: Request,
+    granularity: str = Query("day", description="day or week"),
+    per_bucket: int = Query(10, ge=0, le=100, description="Event summaries returned per bucket"),
+    filters: EventFilters = Depends(get_filters),
+    db: AsyncSession = Depends(get_db),
 ):
-    db: Session = SessionLocal()
+    if granularity not in CALENDAR_BUCKETS:
+        raise HTTPException(status_code=422, detail=f"Unknown granularity: {granularity}")
+
+    async def query_calendar() -> bytes:
+        events = filtered_events(filters)
+        start = events.c.start_datetime
+        bucket = CALENDAR_BUCKETS[granularity](start)
+
+        # Rows come out of the window function ordered by bucket and start,
+        # which is the order json_group_array collects them in
+        ranked = (
+            select(
+                bucket.label("bucket"),
+                func.row_number().over(partition_by=bucket, order_by=(start, events.c.id)).label("rank"),
+                func.json_object(
+                    "id", events.c.id,
+                    "title", events.c.title,
+                    "start_datetime", func.strftime("%Y-%m-%dT%H:%M:%S", start),
+                    "attending", events.c.attending,
+                    "color", events.c.color,
+                ).label("summary"),
+            )
+            .where(start.is_not(None))
+            .subquery()
+        )
+        query = (
+            select(
+                ranked.c.bucket,
+                func.count().label("count"),
+                func.json_group_array(func.json(ranked.c.summary)).filter(ranked.c.rank <= per_bucket).label("events"),
+            )
+            .group_by(ranked.c.bucket)
+            .order_by(ranked.c.bucket)
+        )
+
+        result = await db.execute(query)
+        buckets = ",".join(
+            f'{{"date":"{row.bucket}","count":{row.count},"events":{row.events}}}' for row in result
+        )
+        return f'{{"granularity":"{granularity}","buckets":[{buckets}]}}'.encode()
+
+    key = cache_key("calendar", filters.model_dump_json(), granularity, per_bucket)
+    etag = etag_for(key)
+    last_modified = await last_modified_at(db)
+    headers = validator_headers(etag, last_modified)
 
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    body = await calendar_cache.get_or_compute(key, query_calendar)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def load_events(db: AsyncSession, ids) -> dict[int, Event]:
+    return {event.id: event for event in (await db.execute(select(Event).where(Event.id.in_(ids)))).scalars()}
+
+
+# Overlapping events within a market, from the in-memory interval index
+@app.get("/events/conflicts", response_model=List[ConflictGroup])
+async def get_event_conflicts(
+    market: Optional[List[str]] = Query(None),
+    start_after: Optional[str] = Query(None, description="ISO datetime or relative, e.g. now-1h"),
+    start_before: Optional[str] = Query(None, description="ISO datetime or relative, e.g. now+7d"),
+    attending_only: bool = Query(False, description="Only look for clashes between events someone is attending"),
+    db: AsyncSession = Depends(get_db),
+):
     try:
-        query = db.query(Event)
+        start_after = naive_local(parse_time_param(start_after))
+        start_before = naive_local(parse_time_param(start_before))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid start_after/start_before: {e}")
 
-        if search:
-            query = query.filter(Event.title.ilike(f"%{search}%"))
+    await conflict_index.refresh(db)
+    groups = conflict_index.groups(market, start_after, start_before, attending_only)
 
-        if market:
-            query = query.filter(Event.market.in_(market))
+    events = await load_events(db, [id for *_, ids in groups for id in ids])
+    return [
+        {"market": market, "start_datetime": start, "end_datetime": end, "events": [events[id] for id in ids if id in events]}
+        for market, start, end, ids in groups
+    ]
 
-        if industry:
-            query = query.filter(Event.industry.in_(industry))
 
-        if organizer:
-            query = query.filter(Event.organizer.in_(organizer))
+@app.post("/events/archive")
+async def archive_events(
+    days: int = Query(ARCHIVE_AFTER_DAYS, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    return {"archived": await archive_past_events(db, days)}
 
-        if start_after:
-            query = query.filter(Event.start_datetime >= start_after)
 
-        if start_before:
-            query = query.filter(Event.start_datetime <= start_before)
+@app.post("/events/dedupe")
+async def dedupe_events(db: AsyncSession = Depends(get_db)):
+    changed = await flag_duplicates(db)
+    await db.commit()
+    duplicates = (await db.execute(select(func.count()).where(Event.duplicate_of.is_not(None)))).scalar()
+    return {"changed": changed, "duplicates": duplicates}
 
-        if valid is not None:
-            query = query.filter(Event.valid == valid)
 
-        # Sorting logic
-        sort_column = getattr(Event, sort, Event.start_datetime)
-        sort_func = asc if order == "asc" else desc
-        query = query.order_by(sort_func(sort_column))
+IDENTITY_CONFLICT = "Another event already has this title, organizer and link"
 
-        events = query.offset(offset).limit(limit).all()
-        return events
 
-    finally:
-        db.close()
+async def commit_or_409(db: AsyncSession):
+    # Events are unique on (title, organizer, canonical link)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=IDENTITY_CONFLICT)
+
+
+# Bulk edits for the table view: every patch is applied in one transaction
+# with a single executemany UPDATE. Ids that do not exist, and patches that
+# would clash with another event, are reported back instead of failing the
+# whole batch.
+@app.patch("/events", response_model=List[EventBulkResult])
+async def bulk_update_events(patches: List[EventPatch], db: AsyncSession = Depends(get_db)):
+    ids = [patch.id for patch in patches]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=422, detail="Each event id may only appear once")
+
+    # Current identity, plus the link and organizer canonical_link depends on
+    found = {
+        row.id: row
+        for row in await db.execute(
+            select(
+                Event.id, Event.title, Event.organizer_id, Event.canonical_link, Event.event_link, Event.organizer
+            ).where(Event.id.in_(ids))
+        )
+    }
+
+    now = datetime.now()
+    memo = {}
+    rows = []
+    changes = []
+    identities = {}
+    for patch in patches:
+        if patch.id not in found:
+            continue
+        current = found[patch.id]
+        values = patch.model_dump(exclude_unset=True, exclude={"id"})
+        row = {"id": patch.id, "updated_at": now}
+        for field, value in values.items():
+            if field in DIMENSIONS:
+                row[f"{field}_id"] = await dimension_id(db, DIMENSIONS[field], value, memo)
+            else:
+                row[field] = value
+        if "event_link" in values or "organizer" in values:
+            row["canonical_link"] = canonical_event_url(
+                values.get("event_link", current.event_link), values.get("organizer", current.organizer)
+            )
+        identity = tuple(row.get(key, getattr(current, key)) for key in ("title", "organizer_id", "canonical_link"))
+        if identity != (current.title, current.organizer_id, current.canonical_link) and None not in identity:
+            identities[patch.id] = identity
+        rows.append(row)
+        changes.append((patch.id, "update", {**values, "updated_at": now}))
+
+    # A patch that would give an event the title, organizer and canonical
+    # link of another one is left out and reported as a conflict
+    conflicts = set()
+    if identities:
+        taken = {
+            (title, organizer_id, canonical_link): id
+            for id, title, organizer_id, canonical_link in await db.execute(
+                select(Event.id, Event.title, Event.organizer_id, Event.canonical_link).where(
+                    tuple_(Event.title, Event.organizer_id, Event.canonical_link).in_(set(identities.values())),
+                    Event.id.not_in(identities),
+                )
+            )
+        }
+        for id, identity in identities.items():
+            if identity in taken:
+                conflicts.add(id)
+            else:
+                taken[identity] = id
+        rows = [row for row in rows if row["id"] not in conflicts]
+        changes = [change for change in changes if change[0] not in conflicts]
+
+    if rows:
+        try:
+            await db.execute(update(Event), rows)
+        except IntegrityError:
+            # Raced with another write, or events swapping identities
+            await db.rollback()
+            raise HTTPException(status_code=409, detail=IDENTITY_CONFLICT)
+        await record_changes(db, changes)
+        await db.commit()
+
+    updated = {
+        event.id: event
+        for event in (await db.execute(select(Event).where(Event.id.in_(found)))).scalars()
+    }
+    return [
+        EventBulkResult(id=id, status="conflict", event=updated.get(id)) if id in conflicts
+        else EventBulkResult(id=id, status="updated", event=updated[id]) if id in updated
+        else EventBulkResult(id=id, status="not_found")
+        for id in ids
+    ]
+
+
+@app.post("/events/delete", response_model=List[EventBulkResult])
+async def bulk_delete_events(ids: List[int] = Body(...), db: AsyncSession = Depends(get_db)):
+    ids = list(dict.fromkeys(ids))
+    deleted = set((await db.execute(
+        delete(Event).where(Event.id.in_(ids)).returning(Event.id)
+    )).scalars())
+
+    if deleted:
+        await record_changes(db, [(id, "delete", None) for id in ids if id in deleted])
+        await db.commit()
+
+    return [
+        EventBulkResult(id=id, status="deleted" if id in deleted else "not_found")
+        for id in ids
+    ]
+
+
+# Delta sync: returns the latest state of every event changed after `since`,
+# plus tombstones for deleted ones. Pass the returned token back as `since`.
+@app.get("/events/changes", response_model=EventChangesResponse)
+async def get_event_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1),
+    db: AsyncSession = Depends(get_db),
+):
+    last_seq = func.max(EventChange.seq).label("seq")
+    result = await db.execute(
+        select(EventChange.event_id, last_seq)
+        .where(EventChange.seq > since)
+        .group_by(EventChange.event_id)
+        .order_by(last_seq)
+        .limit(limit + 1)
+    )
+    changed = result.all()
+    has_more = len(changed) > limit
+    changed = changed[:limit]
+
+    if not changed:
+        return {"token": since, "has_more": False, "events": [], "deleted": []}
+
+    ids = [row.event_id for row in changed]
+    result = await db.execute(select(Event).where(Event.id.in_(ids)))
+    events = {ev.id: ev for ev in result.scalars()}
+
+    return {
+        "token": changed[-1].seq,
+        "has_more": has_more,
+        "events": [events[i] for i in ids if i in events],
+        "deleted": [i for i in ids if i not in events],
+    }
+
+
+SSE_HEARTBEAT_SECONDS = 15
+SSE_REPLAY_LIMIT = 500
+
+
+# Pushes committed changes as {"seq", "id", "op", "fields"} notifications.
+# Reconnecting clients (Last-Event-ID) first get the ids changed while they
+# were away, or a resync event if they missed too much.
+@app.get("/events/stream")
+async def stream_event_changes(request: Request, since: Optional[int] = Query(None, ge=0)):
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def stream():
+        queue = broadcaster.subscribe()
+        last_seq = since or 0
+        try:
+            yield b"retry: 3000\n\n"
+
+            if since is not None:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(
+                        select(EventChange.seq, EventChange.event_id, EventChange.op)
+                        .where(EventChange.seq > since)
+                        .order_by(EventChange.seq)
+                        .limit(SSE_REPLAY_LIMIT + 1)
+                    )
+                    missed = result.all()
+
+                if len(missed) > SSE_REPLAY_LIMIT:
+                    yield format_sse({"op": "resync"})
+                    missed = []
+                for seq, id, op in missed:
+                    yield format_sse({"seq": seq, "id": id, "op": op, "fields": None})
+                    last_seq = seq
+
+            while True:
+                try:
+                    notification = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+
+                seq = notification.get("seq")
+                if seq is not None and seq <= last_seq:
+                    continue  # already sent during replay
+                last_seq = seq or last_seq
+                yield format_sse(notification)
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def get_event_or_404(db: AsyncSession, id: int) -> Event:
+    event = await db.get(Event, id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return event
 
 
 @app.get("/events/{id}", response_model=EventResponse)
-def get_event(id: int):
-    db = SessionLocal()
-    try:
-        event = db.query(Event).filter(Event.id == id).first()
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
-        return event
-    finally:
-        db.close()
+async def get_event(id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    etag = etag_for(cache_key("event", id))
+    if is_not_modified(request, etag, exists=False):
+        return Response(status_code=304, headers=validator_headers(etag))
+
+    event = await db.get(Event, id) or await db.get(EventArchive, id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if is_not_modified(request, etag):  # If-None-Match: *
+        return Response(status_code=304, headers=validator_headers(etag, event.updated_at))
+
+    response.headers.update(validator_headers(etag, event.updated_at))
+    return event
+
+
+@app.get("/events/{id}/conflicts", response_model=List[EventResponse])
+async def get_conflicts_with_event(
+    id: int,
+    attending_only: bool = Query(False, description="Only return conflicting events someone is attending"),
+    db: AsyncSession = Depends(get_db),
+):
+    event = await db.get(Event, id) or await db.get(EventArchive, id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.start_datetime is None:
+        return []
+
+    await conflict_index.refresh(db)
+    start, end = event_interval(event.start_datetime, event.end_datetime)
+    ids = [other for other in conflict_index.overlapping(event.market, start, end, attending_only) if other != id]
+
+    events = await load_events(db, ids)
+    return [events[other] for other in ids if other in events]
 
 
 @app.put("/events/{id}", response_model=EventResponse)
-def update_event(id: int, update: EventUpdate):
-    db = SessionLocal()
-    try:
-        event = db.query(Event).filter(Event.id == id).first()
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
+async def update_event(id: int, update: EventUpdate, db: AsyncSession = Depends(get_db)):
+    event = await get_event_or_404(db, id)
 
-        for field, value in update.model_dump(exclude_unset=True).items():
-            setattr(event, field, value)
+    await assign_fields(db, event, update.model_dump(exclude_unset=True))
 
-        event.updated_at = datetime.now()
-        db.commit()
-        db.refresh(event)
+    event.updated_at = datetime.now()
+    await commit_or_409(db)
 
-        return event
-    finally:
-        db.close()
+    return event
 
 
 @app.delete("/events/{id}", response_model=EventResponse)
-def delete_event(id: int):
-    db = SessionLocal()
-    try:
-        event = db.query(Event).filter(Event.id == id).first()
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
+async def delete_event(id: int, db: AsyncSession = Depends(get_db)):
+    event = await get_event_or_404(db, id)
 
-        db.delete(event)
-        db.commit()
-        return event
-    finally:
-        db.close()
+    await db.delete(event)
+    await db.commit()
+    return event
 
 
 @app.post("/events/new", response_model=EventResponse)
-def create_event(event: EventCreate):
-    db = SessionLocal()
-    try:
-        new_event = Event(
-            title=event.title,
-            organizer=event.organizer,
-            event_link=event.event_link,
-            market=event.market,
-            industry=event.industry,
-            attending=event.attending,
-            color=event.color,
-            note=event.note,
-            start_datetime=event.start_datetime,
-            end_datetime=event.end_datetime,
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-            valid=event.valid if event.valid is not None else True,
-        )
-
-        db.add(new_event)
-        db.commit()
-        db.refresh(new_event)
-        return new_event
-    finally:
-        db.close()
+async def create_event(event: EventCreate, db: AsyncSession = Depends(get_db)):
+    new_event = Event(
+        title=event.title,
+        event_link=event.event_link,
+        canonical_link=canonical_event_url(event.event_link, event.organizer),
+        attending=event.attending,
+        color=event.color,
+        note=event.note,
+        start_datetime=event.start_datetime,
+        end_datetime=event.end_datetime,
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        valid=event.valid if event.valid is not None else True,
+    )
+    await assign_fields(
+        db,
+        new_event,
+        {"organizer": event.organizer, "market": event.market, "industry": event.industry},
+    )
+
+    db.add(new_event)
+    await commit_or_409(db)
+    return new_event
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+from typing import List, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import String, or_, select, type_coerce, union_all
+from sqlalchemy.orm import aliased
+
+from app.src.db.dimensions import DIMENSIONS
+from app.src.db.models import Event, EventArchive
+from app.src.db.schemas import EventFilters, EventResponse
+from app.src.serialize import DATETIME_FIELDS
+from app.src.utils import parse_time_param
+
+# Query parameters and select builders shared by the API routers
+
+
+def get_filters(
+    search: Optional[str] = Query(None),
+    market: Optional[List[str]] = Query(None),
+    industry: Optional[List[str]] = Query(None),
+    organizer: Optional[List[str]] = Query(None),
+    valid: Optional[bool] = Query(True),
+    start_after: Optional[str] = Query(None, description="ISO datetime or relative, e.g. now-1h"),
+    start_before: Optional[str] = Query(None, description="ISO datetime or relative, e.g. now+7d"),
+    window: Optional[str] = Query(None, description="upcoming, past or all"),
+    include_archived: bool = Query(False),
+    include_duplicates: bool = Query(False, description="Also list events flagged as copies of another event"),
+) -> EventFilters:
+    try:
+        start_after = parse_time_param(start_after)
+        start_before = parse_time_param(start_before)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid start_after/start_before: {e}")
+
+    # Named windows resolve to the same bucketed "now" as relative times
+    if window == "upcoming":
+        start_after = start_after or parse_time_param("now")
+    elif window == "past":
+        start_before = start_before or parse_time_param("now")
+    elif window not in (None, "all"):
+        raise HTTPException(status_code=422, detail=f"Unknown window: {window}")
+
+    # Lists are sorted and de-duplicated so equivalent queries share a cache key
+    return EventFilters(
+        search=search,
+        market=sorted(set(market)) if market else None,
+        industry=sorted(set(industry)) if industry else None,
+        organizer=sorted(set(organizer)) if organizer else None,
+        valid=valid,
+        start_after=start_after,
+        start_before=start_before,
+        include_archived=include_archived,
+        include_duplicates=include_duplicates,
+    )
+
+
+def not_hidden_copy(model):
+    # A copy stays hidden only while the event it duplicates still exists
+    original = aliased(model)
+    return or_(
+        model.duplicate_of.is_(None),
+        ~select(original.id).where(original.id == model.duplicate_of).exists(),
+    )
+
+
+def apply_filters(query, model, filters: EventFilters):
+    if filters.search:
+        query = query.filter(model.title.ilike(f"%{filters.search}%"))
+
+    # Names are resolved to ids once, so rows are matched on integer keys
+    for field, dimension in DIMENSIONS.items():
+        names = getattr(filters, field)
+        if names:
+            ids = select(dimension.id).where(dimension.name.in_(names))
+            query = query.filter(getattr(model, f"{field}_id").in_(ids))
+
+    if filters.start_after:
+        query = query.filter(model.start_datetime >= filters.start_after)
+
+    if filters.start_before:
+        query = query.filter(model.start_datetime <= filters.start_before)
+
+    if filters.valid is not None:
+        query = query.filter(model.valid == filters.valid)
+
+    if not filters.include_duplicates:
+        query = query.filter(not_hidden_copy(model))
+
+    return query
+
+
+def filtered_events(filters: EventFilters):
+    # Subquery over the hot table, or over hot + archive when requested
+    hot = apply_filters(select(*Event.__table__.columns), Event, filters)
+    if not filters.include_archived:
+        return hot.subquery()
+
+    cold = apply_filters(
+        select(*[EventArchive.__table__.c[c.name] for c in Event.__table__.columns]),
+        EventArchive,
+        filters,
+    )
+    return union_all(hot, cold).subquery()
+
+
+def event_rows(events, fields=tuple(EventResponse.model_fields)):
+    # EventResponse-shaped select over a filtered_events subquery, limited to
+    # `fields`. Datetimes come back as the stored text, which the row encoder
+    # formats directly.
+    columns = []
+    for field in fields:
+        if field in DIMENSIONS:
+            columns.append(DIMENSIONS[field].name.label(field))
+        elif field in DATETIME_FIELDS:
+            columns.append(type_coerce(events.c[field], String).label(field))
+        else:
+            columns.append(events.c[field])
+
+    query = select(*columns).select_from(events)
+    for field, dimension in DIMENSIONS.items():
+        if field in fields:
+            query = query.outerjoin(dimension, dimension.id == events.c[f"{field}_id"])
+    return query
+
+
+def sort_key(events, sort: str):
+    # Works whether or not the sort field is part of the projection
+    if sort in DIMENSIONS:
+        dimension = DIMENSIONS[sort]
+        return (
+            select(dimension.name)
+            .where(dimension.id == events.c[f"{sort}_id"])
+            .correlate_except(dimension)
+            .scalar_subquery()
+        )
+    return events.c[sort]
+
+
+def get_fields(
+    fields: Optional[List[str]] = Query(
+        None, description="Comma-separated EventResponse fields to return; id is always included"
+    ),
+) -> tuple:
+    if not fields:
+        return tuple(EventResponse.model_fields)
+
+    requested = {name.strip() for value in fields for name in value.split(",") if name.strip()}
+    unknown = requested - EventResponse.model_fields.keys()
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    # Schema order, so any spelling of the same set shares a cache key
+    return tuple(name for name in EventResponse.model_fields if name == "id" or name in requested)
@@ -0,0 +1,39 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.src.db.database import get_db
+from app.src.db.models import ScrapeRun
+from app.src.db.schemas import ScrapeRunResponse
+
+# Scrape health ledger (see app.src.scrape_health): the latest run of every
+# site, and one site's history.
+
+router = APIRouter(prefix="/scrapes", tags=["scrapes"])
+
+
+@router.get("", response_model=List[ScrapeRunResponse])
+async def latest_scrapes(
+    flagged: bool = Query(False, description="Only sites whose latest run is not ok"),
+    db: AsyncSession = Depends(get_db),
+):
+    latest = select(func.max(ScrapeRun.id)).group_by(ScrapeRun.site)
+    query = select(ScrapeRun).where(ScrapeRun.id.in_(latest))
+    if flagged:
+        query = query.where(ScrapeRun.status != "ok")
+    result = await db.execute(query.order_by(ScrapeRun.site))
+    return result.scalars().all()
+
+
+@router.get("/{site}", response_model=List[ScrapeRunResponse])
+async def site_scrapes(
+    site: str,
+    limit: int = Query(50, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await db.execute(
+        select(ScrapeRun).where(ScrapeRun.site == site).order_by(ScrapeRun.id.desc()).limit(limit)
+    )
+    return result.scalars().all()
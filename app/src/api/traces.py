@@ -0,0 +1,32 @@
+import os
+import re
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from app.src.db.schemas import TraceSummary
+from app.src.tracing import TRACE_DIR, trace_summaries
+
+# Refresh traces written by app.src.tracing: per-stage summaries of the
+# recent ones, and the Chrome trace file of one for Perfetto/chrome://tracing.
+
+router = APIRouter(prefix="/traces", tags=["traces"])
+
+TRACE_ID = re.compile(r"^[\w.-]+$")
+
+
+@router.get("", response_model=List[TraceSummary])
+async def list_traces(
+    site: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=200),
+):
+    return trace_summaries(limit, site)
+
+
+@router.get("/{trace_id}")
+async def get_trace(trace_id: str):
+    path = os.path.join(TRACE_DIR, f"{trace_id}.json")
+    if not TRACE_ID.match(trace_id) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return FileResponse(path, media_type="application/json", filename=f"{trace_id}.json")
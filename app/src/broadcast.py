@@ -0,0 +1,76 @@
+import asyncio
+import json
+from datetime import datetime
+
+# In-process fan-out of committed event changes to SSE subscribers. Each
+# subscriber gets a bounded queue; one that falls behind is told to resync
+# instead of holding up the publisher. Listeners are plain callbacks for
+# in-process indexes that need to know which events changed.
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class ChangeBroadcaster:
+    def __init__(self):
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._listeners: list = []
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def subscribe(self) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, notifications: list[dict]):
+        if not notifications:
+            return
+        for callback in self._listeners:
+            callback(notifications)
+
+        if not self._subscribers:
+            return
+
+        # Commits from sync sessions may happen off the event loop thread
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(notifications)
+        elif self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, notifications)
+
+    def _deliver(self, notifications: list[dict]):
+        for queue in list(self._subscribers):
+            for notification in notifications:
+                try:
+                    queue.put_nowait(notification)
+                except asyncio.QueueFull:
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait({"op": "resync"})
+                    break
+
+
+broadcaster = ChangeBroadcaster()
+
+
+def json_default(value):
+    # Same datetime format as the JSON API responses
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def format_sse(notification: dict) -> bytes:
+    lines = []
+    if notification.get("seq") is not None:
+        lines.append(f"id: {notification['seq']}")
+    lines.append("event: change" if notification["op"] != "resync" else "event: resync")
+    lines.append(f"data: {json.dumps(notification, default=json_default, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
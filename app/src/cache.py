@@ -0,0 +1,69 @@
+import asyncio
+
+from cachetools import LRUCache
+
+from app.src.metrics import cache_requests_total
+
+# The newest change-log seq this process's reads reflect, advanced after
+# every commit that changed events (here or in another worker). Cache keys
+# embed it, so entries computed against an older generation are never served
+# again and simply age out of their LRU. Being the persisted log head, it is
+# the same in every worker and across restarts, which keeps ETags built from
+# these keys stable.
+_generation = 0
+
+
+def current_generation() -> int:
+    return _generation
+
+
+def advance_generation(seq: int) -> int:
+    global _generation
+    _generation = max(_generation, seq)
+    return _generation
+
+
+def cache_key(*parts) -> tuple:
+    # Take the key before querying: a write that lands mid-query then makes
+    # the stored entry unreachable instead of serving it as fresh.
+    return (_generation, *parts)
+
+
+class ResponseCache:
+    # LRU of serialized response bodies. Concurrent misses for the same key
+    # share one computation instead of each running the query.
+    def __init__(self, name: str, maxsize: int = 128):
+        self.name = name
+        self._entries = LRUCache(maxsize=maxsize)
+        self._inflight: dict[tuple, asyncio.Future] = {}
+
+    async def get_or_compute(self, key: tuple, compute) -> bytes:
+        body = self._entries.get(key)
+        if body is not None:
+            cache_requests_total.inc(self.name, "hit")
+            return body
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            cache_requests_total.inc(self.name, "shared")
+            return await asyncio.shield(pending)
+
+        cache_requests_total.inc(self.name, "miss")
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            body = await compute()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                future.exception()  # waiters re-raise it; avoid "never retrieved"
+            else:
+                future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+        self._entries[key] = body
+        future.set_result(body)
+        return body
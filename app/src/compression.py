@@ -0,0 +1,178 @@
+import gzip
+import os
+import zlib
+
+from cachetools import LRUCache
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Never compressed: already-compressed payloads and SSE, which must reach
+# the client one event at a time.
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "application/zip", "application/gzip")
+
+# Suffixes appended to a strong ETag so each encoding has its own validator
+ETAG_SUFFIXES = {"br": "-br", "gzip": "-gzip"}
+
+
+def strip_etag_suffix(tag: str) -> str:
+    for suffix in ETAG_SUFFIXES.values():
+        if tag.endswith(suffix + '"'):
+            return tag[: -len(suffix) - 1] + '"'
+    return tag
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+
+    # Highest q wins; br before gzip only breaks ties
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._flush = self._impl.flush
+            self._finish = self._impl.finish
+            self.compress = self._impl.process
+        else:
+            self._impl = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._flush = lambda: self._impl.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._impl.flush
+            self.compress = self._impl.compress
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flushed per chunk so streamed responses are not held back
+        return self.compress(data) + self._flush()
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def compress_body(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    # Content-negotiated brotli/gzip for responses above COMPRESSION_MIN_SIZE.
+    # Bodies that carry a strong ETag are deterministic, so their compressed
+    # form is cached and repeated downloads skip the compressor.
+    def __init__(self, app, maxsize: int = 64):
+        self.app = app
+        self.compressed = LRUCache(maxsize=maxsize)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                content_type = headers.get("content-type", "")
+
+                if start["status"] == 304:
+                    # Echo the encoded tag the client revalidated with
+                    etag = headers.get("etag")
+                    encoded = etag and etag[:-1] + ETAG_SUFFIXES[encoding] + '"'
+                    if encoded and encoded in request_headers.get("if-none-match", ""):
+                        headers["ETag"] = encoded
+
+                if (
+                    start["status"] < 200
+                    or start["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or content_type.startswith(SKIP_CONTENT_TYPES)
+                    or (not more_body and len(body) < COMPRESSION_MIN_SIZE)
+                ):
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+
+                etag = headers.get("etag")
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = etag[:-1] + ETAG_SUFFIXES[encoding] + '"'
+
+                if not more_body:
+                    key = (etag, encoding)
+                    compressed = self.compressed.get(key) if etag else None
+                    if compressed is None:
+                        compressed = compress_body(encoding, body)
+                        if etag:
+                            self.compressed[key] = compressed
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start)
+                    start = None
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                # Streaming response: compress chunk by chunk
+                del headers["Content-Length"]
+                compressor = Compressor(encoding)
+                await send(start)
+                start = None
+                message = {**message, "body": compressor.chunk(body)}
+                await send(message)
+                return
+
+            if compressor is None:
+                await send(message)
+                return
+
+            body = compressor.chunk(message.get("body", b""))
+            if not message.get("more_body", False):
+                body += compressor.finish()
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,54 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+
+from app.src.compression import strip_etag_suffix
+
+# Keys come from cache_key(), whose generation is the change-log head, so
+# every worker hands out the same tag for the same data, also after a restart.
+def etag_for(key: tuple) -> str:
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def to_utc_seconds(dt: datetime) -> datetime:
+    # Stored datetimes are naive local time; HTTP dates are whole-second GMT
+    return dt.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def http_date(dt: datetime) -> str:
+    return format_datetime(to_utc_seconds(dt), usegmt=True)
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None = None, exists: bool = True
+) -> bool:
+    # If-None-Match wins over If-Modified-Since, as in RFC 9110. "*" only
+    # matches a resource that exists; pass exists=False when that is not
+    # known yet.
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Tags may carry the suffix CompressionMiddleware adds per encoding
+        tags = [strip_etag_suffix(tag.strip().removeprefix("W/")) for tag in if_none_match.split(",")]
+        return ("*" in tags and exists) or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return to_utc_seconds(last_modified) <= since
+
+    return False
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
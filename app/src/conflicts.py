@@ -0,0 +1,151 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from sortedcontainers import SortedList
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.src.api.queries import not_hidden_copy
+from app.src.broadcast import broadcaster
+from app.src.db.models import Event, Market
+
+# In-memory interval index over valid hot events, per market, for overlap
+# queries. Events up to LONG_EVENT_HOURS long sit in a start-sorted list, so
+# a lookup only walks the starts between (window start - LONG_EVENT_HOURS)
+# and the window end. The few longer, multi-day events are checked one by
+# one. Committed writes mark their ids dirty; only those rows are reloaded
+# before the next query.
+
+LONG_EVENT_HOURS = int(os.getenv("CONFLICT_LONG_EVENT_HOURS", "24"))
+DEFAULT_DURATION_MINUTES = int(os.getenv("CONFLICT_DEFAULT_DURATION_MINUTES", "60"))
+
+
+def event_interval(start: datetime, end: datetime | None) -> tuple[datetime, datetime]:
+    # Events without a usable end are treated as DEFAULT_DURATION_MINUTES long
+    if end is None or end <= start:
+        end = start + timedelta(minutes=DEFAULT_DURATION_MINUTES)
+    return start, end
+
+
+def naive_local(dt: datetime | None) -> datetime | None:
+    # The index holds naive local datetimes, as stored; query bounds with an
+    # offset ("...Z") are converted so they can be compared with them
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
+class ConflictIndex:
+    def __init__(self):
+        self._short: dict[str | None, SortedList] = {}
+        self._long: dict[str | None, dict[int, tuple]] = {}
+        self._entries: dict[int, tuple] = {}  # id -> (market, start, end, attending)
+        self._dirty: set[int] = set()
+        self._stale = True
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, notifications: list[dict]):
+        for notification in notifications:
+            if notification.get("id") is None:
+                self._stale = True
+            else:
+                self._dirty.add(notification["id"])
+
+    async def refresh(self, db: AsyncSession):
+        query = (
+            select(Event.id, Market.name, Event.start_datetime, Event.end_datetime, Event.attending)
+            .outerjoin(Market, Market.id == Event.market_id)
+            .where(Event.valid.is_(True), Event.start_datetime.is_not(None), not_hidden_copy(Event))
+        )
+
+        async with self._lock:
+            if self._stale:
+                self._stale = False
+                self._dirty.clear()
+                self._short.clear()
+                self._long.clear()
+                self._entries.clear()
+            elif self._dirty:
+                ids, self._dirty = self._dirty, set()
+                # Copies of a changed event may have become visible or hidden
+                copies = await db.execute(select(Event.id).where(Event.duplicate_of.in_(ids)))
+                ids |= set(copies.scalars())
+                for id in ids:
+                    self._remove(id)
+                query = query.where(Event.id.in_(ids))
+            else:
+                return
+
+            for id, market, start, end, attending in await db.execute(query):
+                self._add(id, market, *event_interval(start, end), bool(attending))
+
+    def _add(self, id: int, market: str | None, start: datetime, end: datetime, attending: bool):
+        self._entries[id] = (market, start, end, attending)
+        if end - start > timedelta(hours=LONG_EVENT_HOURS):
+            self._long.setdefault(market, {})[id] = (start, end, id)
+        else:
+            self._short.setdefault(market, SortedList()).add((start, end, id))
+
+    def _remove(self, id: int):
+        entry = self._entries.pop(id, None)
+        if entry is None:
+            return
+        market, start, end, _ = entry
+        if id in self._long.get(market, {}):
+            del self._long[market][id]
+        else:
+            self._short[market].remove((start, end, id))
+
+    def overlapping(self, market: str | None, start: datetime, end: datetime, attending_only: bool = False) -> list[int]:
+        # Ids of events in `market` whose interval intersects [start, end)
+        found = []
+        short = self._short.get(market)
+        if short:
+            earliest = start - timedelta(hours=LONG_EVENT_HOURS)
+            for other_start, other_end, id in short.irange((earliest,), (end,), inclusive=(True, False)):
+                if other_end > start:
+                    found.append((other_start, id))
+        for other_start, other_end, id in self._long.get(market, {}).values():
+            if other_start < end and other_end > start:
+                found.append((other_start, id))
+
+        found.sort()
+        return [id for _, id in found if not attending_only or self._entries[id][3]]
+
+    def groups(
+        self,
+        markets: list[str] | None = None,
+        start_after: datetime | None = None,
+        start_before: datetime | None = None,
+        attending_only: bool = False,
+    ) -> list[tuple[str | None, datetime, datetime, list[int]]]:
+        # Sweep line per market: events whose intervals chain together form
+        # one group; groups of two or more are conflicts
+        result = []
+        for market in sorted(set(self._short) | set(self._long), key=lambda m: (m is None, m or "")):
+            if markets and market not in markets:
+                continue
+
+            intervals = sorted([*self._short.get(market, ()), *self._long.get(market, {}).values()])
+
+            group, group_start, group_end = [], None, None
+            for start, end, id in intervals:
+                if start_after and start < start_after or start_before and start > start_before:
+                    continue
+                if attending_only and not self._entries[id][3]:
+                    continue
+                if group and start < group_end:
+                    group.append(id)
+                    group_end = max(group_end, end)
+                    continue
+                if len(group) > 1:
+                    result.append((market, group_start, group_end, group))
+                group, group_start, group_end = [id], start, end
+            if len(group) > 1:
+                result.append((market, group_start, group_end, group))
+        return result
+
+
+conflict_index = ConflictIndex()
+broadcaster.add_listener(conflict_index.invalidate)
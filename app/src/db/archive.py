@@ -0,0 +1,68 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.src.db.changes import mark_changed
+from app.src.db.database import AsyncSessionLocal
+from app.src.db.models import Event, EventArchive, EventChange
+from app.src.locks import ProcessLock
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "24"))
+
+EVENT_COLUMNS = [c.name for c in Event.__table__.columns]
+
+
+async def archive_past_events(db: AsyncSession, days: int = ARCHIVE_AFTER_DAYS) -> int:
+    # Moves events that ended more than `days` ago into events_archive in one
+    # transaction. Events without any dates are never archived.
+    now = datetime.now()
+    cutoff = now - timedelta(days=days)
+    ended = func.coalesce(Event.end_datetime, Event.start_datetime) < cutoff
+
+    # Plain INSERT: an id already in the archive is an error, not a row to replace
+    await db.execute(
+        insert(EventArchive)
+        .from_select(
+            EVENT_COLUMNS + ["archived_at"],
+            select(*Event.__table__.columns, literal(now)).where(ended),
+        )
+    )
+    # Core statements bypass the ORM change listener, so log these directly
+    logged = await db.execute(
+        insert(EventChange)
+        .from_select(
+            ["event_id", "op", "changed_at"],
+            select(Event.id, literal("archive"), literal(now)).where(ended).order_by(Event.id),
+        )
+        .returning(EventChange.seq, EventChange.event_id)
+    )
+    notifications = [{"seq": seq, "id": id, "op": "archive", "fields": None} for seq, id in logged]
+    result = await db.execute(delete(Event).where(ended))
+    if result.rowcount:
+        mark_changed(db, notifications)
+    await db.commit()
+
+    return result.rowcount
+
+
+async def archive_loop():
+    # With several worker processes only the one holding the lock archives;
+    # the others keep checking in case it goes away
+    lock = ProcessLock("archiver")
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(60)
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                moved = await archive_past_events(db)
+            if moved:
+                print(f"📦 Archived {moved} past events")
+        except Exception as e:
+            print(f"[WARNING] Archiving past events failed: {e}")
+
+        await asyncio.sleep(ARCHIVE_INTERVAL_HOURS * 3600)
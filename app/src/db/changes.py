@@ -0,0 +1,124 @@
+from datetime import datetime
+
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+
+from app.src.broadcast import broadcaster
+from app.src.cache import advance_generation
+from app.src.db.models import Event, EventChange
+from app.src.db.schemas import EventResponse
+
+
+# Newest change-log seq this process has accounted for. Seqs of commits made
+# here are remembered, so anything else newer in the log was written by
+# another worker process.
+_seen_seq = 0
+_local_seqs: set[int] = set()
+
+
+def last_seen_seq() -> int:
+    return _seen_seq
+
+
+def mark_seen(seq: int):
+    global _seen_seq
+    _seen_seq = max(_seen_seq, seq)
+
+
+def apply_external_changes(rows):
+    # rows: (seq, event_id, op) newer than last_seen_seq(), in seq order
+    external = []
+    for seq, id, op in rows:
+        if seq in _local_seqs:
+            _local_seqs.discard(seq)
+        else:
+            external.append({"seq": seq, "id": id, "op": op, "fields": None})
+        mark_seen(seq)
+
+    if external:
+        advance_generation(external[-1]["seq"])
+        broadcaster.publish(external)
+
+
+def mark_changed(session, notifications: list[dict] = ()):
+    session.info["events_changed"] = True
+    session.info.setdefault("notifications", []).extend(notifications)
+
+
+def changed_fields(obj, op: str) -> dict | None:
+    # Values the subscriber needs to patch its copy: every field for an
+    # insert, only the modified ones for an update
+    if op == "delete":
+        return None
+    state = inspect(obj)
+    return {
+        name: state.attrs[name].value
+        for name in EventResponse.model_fields
+        if op == "insert" or state.attrs[name].history.has_changes()
+    }
+
+
+async def record_changes(db, changes: list[tuple[int, str, dict | None]]):
+    # Bulk statements skip the flush listener, so their callers log
+    # (event_id, op, fields) themselves
+    if not changes:
+        return
+    now = datetime.now()
+    result = await db.execute(
+        insert(EventChange).returning(EventChange.seq, sort_by_parameter_order=True),
+        [{"event_id": id, "op": op, "changed_at": now} for id, op, _ in changes],
+    )
+    mark_changed(db, [
+        {"seq": seq, "id": id, "op": op, "fields": fields}
+        for seq, (id, op, fields) in zip(result.scalars(), changes)
+    ])
+
+
+# Every ORM flush that touches an Event appends to the change log in the same
+# transaction, so write paths cannot forget to record their changes.
+@event.listens_for(Session, "after_flush")
+def record_event_changes(session, flush_context):
+    now = datetime.now()
+    changes = []
+
+    for obj in session.new:
+        if isinstance(obj, Event):
+            changes.append((obj, "insert"))
+
+    for obj in session.dirty:
+        if isinstance(obj, Event) and session.is_modified(obj, include_collections=False):
+            changes.append((obj, "update"))
+
+    for obj in session.deleted:
+        if isinstance(obj, Event):
+            changes.append((obj, "delete"))
+
+    if not changes:
+        return
+
+    result = session.connection().execute(
+        insert(EventChange).returning(EventChange.seq, sort_by_parameter_order=True),
+        [{"event_id": obj.id, "op": op, "changed_at": now} for obj, op in changes],
+    )
+    mark_changed(session, [
+        {"seq": seq, "id": obj.id, "op": op, "fields": changed_fields(obj, op)}
+        for seq, (obj, op) in zip(result.scalars(), changes)
+    ])
+
+
+# Cached reads are keyed by generation, so advancing it invalidates them.
+# Subscribers only hear about changes once they are committed.
+@event.listens_for(Session, "after_commit")
+def invalidate_caches(session):
+    changed = session.info.pop("events_changed", False)
+    notifications = session.info.pop("notifications", [])
+    if changed:
+        advance_generation(max((n.get("seq", 0) for n in notifications), default=0))
+    _local_seqs.update(n["seq"] for n in notifications if n.get("seq", 0) > _seen_seq)
+    broadcaster.publish(notifications)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changes(session):
+    session.info.pop("events_changed", None)
+    session.info.pop("notifications", None)
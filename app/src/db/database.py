@@ -1,16 +1,120 @@
-from sqlalchemy import create_engine
+import asyncio
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from app.src.cache import advance_generation
 from app.src.db.models import Base
+from app.src.db.changes import apply_external_changes, last_seen_seq, mark_seen
+from app.src.db.migrations import run_migrations
+from app.src.db.models import EventChange
+from app.src.locks import ProcessLock
+from app.src.metrics import db_query_seconds
 import os
+import time
 
 DB_DIR = "app/data"
 os.makedirs(DB_DIR, exist_ok=True)
 DB_PATH = os.path.join(DB_DIR, "events.db")
 DATABASE_URL = f"sqlite:///{DB_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Used by the API so DB calls are awaited instead of blocking the event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+CHANGE_POLL_SECONDS = float(os.getenv("CHANGE_POLL_SECONDS", "1"))
+
+
+# WAL lets worker processes keep reading while one of them writes, and the
+# busy timeout makes a second writer wait for the lock instead of failing
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def observe_query_time(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_query_seconds.observe(elapsed, statement.lstrip().split(None, 1)[0].lower())
+
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    # Every worker imports the app, but only one at a time may migrate
+    with ProcessLock("init"):
+        Base.metadata.create_all(bind=engine)
+
+        with engine.begin() as conn:
+            run_migrations(conn)
+            head = conn.execute(select(func.max(EventChange.seq))).scalar() or 0
+            mark_seen(head)
+            advance_generation(head)
+
+
+_db_file_state = None
+
+
+def db_file_state() -> tuple:
+    # Any commit, from any process, touches the WAL file or (after a
+    # checkpoint) the database file
+    state = []
+    for path in (DB_PATH, f"{DB_PATH}-wal"):
+        try:
+            stat = os.stat(path)
+            state.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            state.append(None)
+    return tuple(state)
+
+
+async def sync_changes():
+    # Picks up commits made by other worker processes from the change log.
+    # Skipped while the database files are untouched, so reads stay cheap.
+    global _db_file_state
+    state = db_file_state()
+    if state == _db_file_state:
+        return
+
+    async with async_engine.connect() as conn:
+        result = await conn.execute(
+            select(EventChange.seq, EventChange.event_id, EventChange.op)
+            .where(EventChange.seq > last_seen_seq())
+            .order_by(EventChange.seq)
+        )
+        apply_external_changes(result.all())
+    _db_file_state = state
+
+
+async def follow_changes():
+    # Keeps SSE subscribers and in-memory indexes current while no requests
+    # arrive to trigger sync_changes()
+    while True:
+        try:
+            await sync_changes()
+        except Exception as e:
+            print(f"[WARNING] Following the change log failed: {e}")
+        await asyncio.sleep(CHANGE_POLL_SECONDS)
+
+
+async def get_db():
+    await sync_changes()
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,40 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.src.db.models import Industry, Market, Organizer
+from app.src.urls import canonical_event_url
+
+DIMENSIONS = {"organizer": Organizer, "market": Market, "industry": Industry}
+
+
+async def dimension_id(db: AsyncSession, model, name: str | None, memo: dict | None = None) -> int | None:
+    # Looks up (or creates) the id for a dimension value. `memo` lets a batch
+    # of writes resolve each distinct value only once.
+    if name is None:
+        return None
+
+    key = (model.__tablename__, name)
+    if memo is not None and key in memo:
+        return memo[key]
+
+    id = (await db.execute(select(model.id).where(model.name == name))).scalar()
+    if id is None:
+        await db.execute(insert(model).values(name=name).on_conflict_do_nothing())
+        id = (await db.execute(select(model.id).where(model.name == name))).scalar_one()
+
+    if memo is not None:
+        memo[key] = id
+    return id
+
+
+async def assign_fields(db: AsyncSession, event, values: dict, memo: dict | None = None):
+    # setattr() for Event fields that maps organizer/market/industry names to
+    # their ids. The name is kept on the instance so responses need no reload.
+    # A new event_link or organizer also updates canonical_link.
+    for field, value in values.items():
+        if field in DIMENSIONS:
+            setattr(event, f"{field}_id", await dimension_id(db, DIMENSIONS[field], value, memo))
+        setattr(event, field, value)
+    if "event_link" in values or "organizer" in values:
+        event.canonical_link = canonical_event_url(event.event_link, event.organizer)
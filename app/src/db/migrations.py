@@ -0,0 +1,224 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from app.src.db.models import Base
+from app.src.urls import canonical_event_url
+
+# Event field -> lookup table it was moved into
+DIMENSION_TABLES = {"organizer": "organizers", "market": "markets", "industry": "industries"}
+
+
+def migrate_dimension_columns(conn):
+    # Databases created before the lookup tables store organizer/market/industry
+    # inline. SQLite cannot alter the unique constraint, so rebuild the table.
+    inspector = inspect(conn)
+
+    for table_name in ("events", "events_archive"):
+        if not inspector.has_table(table_name):
+            continue
+
+        legacy_columns = {c["name"] for c in inspector.get_columns(table_name)}
+        if "organizer_id" in legacy_columns:
+            continue
+
+        print(f"🔧 Moving organizer/market/industry of {table_name} into lookup tables")
+
+        for field, dimension in DIMENSION_TABLES.items():
+            conn.execute(text(
+                f"INSERT OR IGNORE INTO {dimension} (name) "
+                f"SELECT DISTINCT {field} FROM {table_name} WHERE {field} IS NOT NULL"
+            ))
+
+        legacy = f"{table_name}_legacy"
+        for index in inspector.get_indexes(table_name):
+            conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+        conn.execute(text(f"ALTER TABLE {table_name} RENAME TO {legacy}"))
+
+        table = Base.metadata.tables[table_name]
+        table.create(conn)
+
+        targets, sources = [], []
+        for column in table.columns:
+            field = column.name.removesuffix("_id")
+            if field in DIMENSION_TABLES:
+                sources.append(f"(SELECT id FROM {DIMENSION_TABLES[field]} WHERE name = l.{field})")
+            elif column.name in legacy_columns:
+                sources.append(f"l.{column.name}")
+            else:
+                continue
+            targets.append(column.name)
+
+        conn.execute(text(
+            f"INSERT INTO {table_name} ({', '.join(targets)}) "
+            f"SELECT {', '.join(sources)} FROM {legacy} l"
+        ))
+        conn.execute(text(f"DROP TABLE {legacy}"))
+
+
+def add_missing_columns(conn):
+    # create_all() only creates missing tables, so columns added to existing
+    # models are added here. New columns must be nullable.
+    inspector = inspect(conn)
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        added = [column for column in table.columns if column.name not in existing]
+        for column in added:
+            print(f"🔧 Adding column {table.name}.{column.name}")
+            conn.execute(text(
+                f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column.type.compile(dialect=conn.dialect)}'
+            ))
+
+        for index in table.indexes:
+            if any(column in index.columns.values() for column in added):
+                index.create(conn, checkfirst=True)
+
+
+def rebuild_events(conn):
+    # SQLite cannot alter table options or constraints, so recreate events
+    # from the model and copy the rows over
+    inspector = inspect(conn)
+    columns = ", ".join(c["name"] for c in inspector.get_columns("events"))
+    for index in inspector.get_indexes("events"):
+        conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+    conn.execute(text("ALTER TABLE events RENAME TO events_legacy"))
+    Base.metadata.tables["events"].create(conn)
+    conn.execute(text(f"INSERT INTO events ({columns}) SELECT {columns} FROM events_legacy"))
+    conn.execute(text("DROP TABLE events_legacy"))
+
+
+def migrate_events_autoincrement(conn):
+    # Without AUTOINCREMENT SQLite reuses the ids of archived events, so
+    # rebuild tables created before it was set
+    sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'events'")).scalar()
+    if sql and "AUTOINCREMENT" not in sql.upper():
+        print("🔧 Rebuilding events with AUTOINCREMENT ids")
+        rebuild_events(conn)
+
+    # New ids start above every id already used, archived ones included
+    used = conn.execute(text(
+        "SELECT MAX(COALESCE((SELECT MAX(id) FROM events), 0), COALESCE((SELECT MAX(id) FROM events_archive), 0))"
+    )).scalar()
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'events' AND seq < :used"), {"used": used})
+    conn.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'events', :used "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'events')"
+    ), {"used": used})
+
+
+def merge_colliding_events(conn, links: dict[int, str]):
+    # Events that would share (title, organizer, canonical link) once `links`
+    # ({id: canonical link}) is written are the same event stored twice. The
+    # oldest row is kept and takes over the attending/color/note it lacks;
+    # the others are deleted and logged so syncing clients drop them too.
+    rows = conn.execute(text(
+        "SELECT id, title, organizer_id, canonical_link, attending, color, note FROM events ORDER BY id"
+    )).all()
+    groups = defaultdict(list)
+    for row in rows:
+        link = links.get(row.id, row.canonical_link)
+        if row.title is not None and row.organizer_id is not None and link is not None:
+            groups[(row.title, row.organizer_id, link)].append(row)
+
+    now = datetime.now()
+    changes = []
+    for keeper, *others in groups.values():
+        if not others:
+            continue
+        removed = [other.id for other in others]
+        values = {
+            field: getattr(keeper, field) or next((getattr(o, field) for o in others if getattr(o, field)), None)
+            for field in ("attending", "color", "note")
+        }
+        conn.execute(
+            text("UPDATE events SET attending = :attending, color = :color, note = :note WHERE id = :id"),
+            {**values, "id": keeper.id},
+        )
+        removed_ids = ", ".join(str(id) for id in removed)
+        conn.execute(text(
+            f"UPDATE events SET duplicate_of = CASE WHEN id = {keeper.id} THEN NULL ELSE {keeper.id} END "
+            f"WHERE duplicate_of IN ({removed_ids})"
+        ))
+        conn.execute(text(f"DELETE FROM events WHERE id IN ({removed_ids})"))
+        changes.append({"event_id": keeper.id, "op": "update", "changed_at": now})
+        changes.extend({"event_id": id, "op": "delete", "changed_at": now} for id in removed)
+
+    if changes:
+        merged = sum(change["op"] == "delete" for change in changes)
+        print(f"🔧 Merged {merged} events that share a title, organizer and canonical link with an older one")
+        conn.execute(
+            text("INSERT INTO event_changes (event_id, op, changed_at) VALUES (:event_id, :op, :changed_at)"),
+            changes,
+        )
+
+
+def set_canonical_links(conn, table_name: str, rows):
+    # rows: (id, event_link, organizer name). Their site is not recorded, so
+    # each organizer's query allow-list is taken from the site configs.
+    links = {id: canonical_event_url(link, organizer) for id, link, organizer in rows}
+    if not links:
+        return
+    if table_name == "events":
+        merge_colliding_events(conn, links)
+    conn.execute(
+        text(f"UPDATE {table_name} SET canonical_link = :canonical_link WHERE id = :id"),
+        [{"id": id, "canonical_link": link} for id, link in links.items()],
+    )
+
+
+def select_links(conn, table_name: str, where: str = "1 = 1"):
+    return conn.execute(text(
+        f"SELECT e.id, e.event_link, o.name FROM {table_name} e "
+        f"LEFT JOIN organizers o ON o.id = e.organizer_id "
+        f"WHERE e.event_link IS NOT NULL AND {where}"
+    )).all()
+
+
+def migrate_event_identity(conn):
+    # Events used to be unique on the raw event_link, so a link scraped with
+    # other parameters stored the event again. They are now unique on the
+    # canonical link. Those were computed with older rules (route fragments
+    # used to be dropped), so recompute them all, merge what now collides and
+    # rebuild the table with the new constraint.
+    identity = ["title", "organizer_id", "canonical_link"]
+    if any(c["column_names"] == identity for c in inspect(conn).get_unique_constraints("events")):
+        return
+
+    print("🔧 Making events unique on title, organizer and canonical link")
+    for table_name in ("events", "events_archive"):
+        set_canonical_links(conn, table_name, select_links(conn, table_name))
+    rebuild_events(conn)
+
+
+def backfill_canonical_links(conn):
+    # Rows stored before canonical_link existed
+    for table_name in ("events", "events_archive"):
+        rows = select_links(conn, table_name, "e.canonical_link IS NULL")
+        if rows:
+            print(f"🔧 Computing canonical links for {len(rows)} rows of {table_name}")
+            set_canonical_links(conn, table_name, rows)
+
+
+def seed_change_log(conn):
+    # Seed the change log once so a client syncing from token 0 sees every
+    # event that existed before change tracking was introduced
+    conn.execute(text(
+        "INSERT INTO event_changes (event_id, op, changed_at) "
+        "SELECT id, 'insert', COALESCE(updated_at, created_at) FROM events "
+        "WHERE NOT EXISTS (SELECT 1 FROM event_changes) ORDER BY id"
+    ))
+
+
+def run_migrations(conn):
+    migrate_dimension_columns(conn)
+    add_missing_columns(conn)
+    migrate_events_autoincrement(conn)
+    # Before anything that may merge events, so the seed lists them first
+    seed_change_log(conn)
+    migrate_event_identity(conn)
+    backfill_canonical_links(conn)
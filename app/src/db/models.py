@@ -1,28 +1,123 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, ForeignKey, JSON, UniqueConstraint, select
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import column_property, declared_attr
 from datetime import datetime
 
 Base = declarative_base()
 
 
-class Event(Base):
-    __tablename__ = "events"
-    __table_args__ = (
-        UniqueConstraint("title", "organizer", "event_link", name="uix_event_identity"),
+# Small lookup tables for the repetitive free-text dimensions. Events store
+# the integer id and expose the name through a read-only column_property.
+class Organizer(Base):
+    __tablename__ = "organizers"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class Market(Base):
+    __tablename__ = "markets"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class Industry(Base):
+    __tablename__ = "industries"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+def dimension_name(model, column):
+    # Not expired on flush: assign_fields() keeps the name in step with the
+    # id, and instances are used after their session closes
+    return column_property(
+        select(model.name).where(model.id == column).correlate_except(model).scalar_subquery(),
+        expire_on_flush=False,
     )
 
+
+class EventColumns:
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
 
     title = Column(String, index=True)
     start_datetime = Column(DateTime)
     end_datetime = Column(DateTime)
-    organizer = Column(String, index=True)
-    industry = Column(String, index=True)
-    market = Column(String, index=True)
+    organizer_id = Column(Integer, ForeignKey("organizers.id"), index=True)
+    industry_id = Column(Integer, ForeignKey("industries.id"), index=True)
+    market_id = Column(Integer, ForeignKey("markets.id"), index=True)
     attending = Column(String, index=True)
     event_link = Column(String, index=True)
+    canonical_link = Column(String, index=True)  # app.src.urls.canonical_url(event_link)
+    content_hash = Column(String)  # of the scraped fields, see app.src.ingest.content_hash
     color = Column(String, index=True)
     note = Column(String)
     valid = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Set by app.src.dedup when the event looks like another source's copy
+    # of an earlier event (the id kept as the original)
+    duplicate_of = Column(Integer, index=True)
+
+    @declared_attr
+    def organizer(cls):
+        return dimension_name(Organizer, cls.organizer_id)
+
+    @declared_attr
+    def industry(cls):
+        return dimension_name(Industry, cls.industry_id)
+
+    @declared_attr
+    def market(cls):
+        return dimension_name(Market, cls.market_id)
+
+
+class Event(EventColumns, Base):
+    __tablename__ = "events"
+    __table_args__ = (
+        UniqueConstraint("title", "organizer_id", "canonical_link", name="uix_event_identity"),
+        # Ids of archived events must never be handed out again
+        {"sqlite_autoincrement": True},
+    )
+
+
+# Events that ended long ago, moved out of the hot table by archive_past_events.
+# Rows keep their original id.
+class EventArchive(EventColumns, Base):
+    __tablename__ = "events_archive"
+
+    archived_at = Column(DateTime, default=datetime.now)
+
+
+class EventChange(Base):
+    __tablename__ = "event_changes"
+    # AUTOINCREMENT keeps seq monotonic; it is handed to clients as a sync token
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(Integer, index=True)
+    op = Column(String)  # insert / update / delete / archive
+    changed_at = Column(DateTime, default=datetime.now)
+
+
+# One row per scrape of a site, written by app.src.scrape_health. Counts are
+# None when the site module does not expose the step they come from.
+class ScrapeRun(Base):
+    __tablename__ = "scrape_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    site = Column(String, index=True)
+    started_at = Column(DateTime, default=datetime.now, index=True)
+    duration_seconds = Column(Float)
+    status = Column(String)  # ok / drop / empty / error
+    events = Column(Integer)  # after the per-site dedupe
+    baseline = Column(Float)  # median events of the trailing runs
+    list_count = Column(Integer)
+    detail_ok = Column(Integer)
+    detail_failed = Column(Integer)
+    parse_failures = Column(JSON)  # {stage: count}
+    http_statuses = Column(JSON)  # {status: count}
+    http_requests = Column(Integer)
+    bytes = Column(Integer)
+    error = Column(String)
@@ -1,5 +1,5 @@
 from fastapi import Query
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -16,6 +16,18 @@ class EventQueryParams(BaseModel):
     offset: int = 0
 
 
+class EventFilters(BaseModel):
+    search: Optional[str] = None
+    market: Optional[List[str]] = None
+    industry: Optional[List[str]] = None
+    organizer: Optional[List[str]] = None
+    valid: Optional[bool] = True
+    start_after: Optional[datetime] = None
+    start_before: Optional[datetime] = None
+    include_archived: bool = False
+    include_duplicates: bool = False
+
+
 class EventResponse(BaseModel):
     id: int
     title: Optional[str]
@@ -31,6 +43,7 @@ class EventResponse(BaseModel):
     valid: Optional[bool]
     created_at: Optional[datetime]
     updated_at: Optional[datetime]
+    duplicate_of: Optional[int]
 
     model_config = {"from_attributes": True}
 
@@ -61,3 +74,106 @@ class EventUpdate(BaseModel):
     start_datetime: Optional[datetime]
     end_datetime: Optional[datetime]
     valid: Optional[bool]
+
+
+class CalendarEventSummary(BaseModel):
+    id: int
+    title: Optional[str]
+    start_datetime: datetime
+    attending: Optional[str]
+    color: Optional[str]
+
+
+class CalendarBucket(BaseModel):
+    date: str  # the day, or the Monday of the week
+    count: int
+    events: List[CalendarEventSummary]
+
+
+class EventCalendarResponse(BaseModel):
+    granularity: str
+    buckets: List[CalendarBucket]
+
+
+class ConflictGroup(BaseModel):
+    market: Optional[str]
+    start_datetime: datetime
+    end_datetime: datetime
+    events: List[EventResponse]
+
+
+class EventPatch(BaseModel):
+    id: int
+    title: Optional[str] = None
+    event_link: Optional[str] = None
+    organizer: Optional[str] = None
+    market: Optional[str] = None
+    industry: Optional[str] = None
+    attending: Optional[str] = None
+    color: Optional[str] = None
+    note: Optional[str] = None
+    start_datetime: Optional[datetime] = None
+    end_datetime: Optional[datetime] = None
+    valid: Optional[bool] = None
+
+
+class EventBulkResult(BaseModel):
+    id: int
+    status: str  # updated, deleted, not_found or conflict
+    event: Optional[EventResponse] = None
+
+
+class EventChangesResponse(BaseModel):
+    token: int
+    has_more: bool
+    events: List[EventResponse]
+    deleted: List[int]
+
+
+class FacetCount(BaseModel):
+    value: Optional[str]
+    count: int
+
+
+class EventFacetsResponse(BaseModel):
+    market: List[FacetCount]
+    industry: List[FacetCount]
+    organizer: List[FacetCount]
+    attending: List[FacetCount]
+
+
+class ScrapeRunResponse(BaseModel):
+    id: int
+    site: str
+    started_at: datetime
+    duration_seconds: Optional[float]
+    status: str  # ok, drop, empty or error
+    events: Optional[int]
+    baseline: Optional[float]
+    list_count: Optional[int]
+    detail_ok: Optional[int]
+    detail_failed: Optional[int]
+    parse_failures: Dict[str, int]
+    http_statuses: Dict[str, int]
+    http_requests: int
+    bytes: int
+    error: Optional[str]
+
+    model_config = {"from_attributes": True}
+
+
+class TraceStage(BaseModel):
+    name: str
+    count: int
+    total_ms: float
+    self_ms: float  # excluding nested stages
+
+
+class TraceSummary(BaseModel):
+    id: str
+    name: str
+    site: Optional[str] = None
+    started_at: datetime
+    duration_ms: float
+    slowest: str  # stage with the most self time
+    stages: List[TraceStage]
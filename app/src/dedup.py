@@ -0,0 +1,110 @@
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.src.db.models import Event
+
+# Cross-source duplicate detection. utils.deduplicate_events only drops exact
+# repeats within one site's batch; here events from every site are blocked by
+# (market, start date) and titles are only compared inside a block, using
+# trigram Jaccard similarity. Blocks are small, so a pass stays close to
+# linear in the number of events. Matches are flagged with duplicate_of
+# pointing at the earliest-created event of the group, never deleted.
+# Similar titles from one organizer are usually a series (Session 1/2, Day
+# 1/2, March/May luncheons), so those only match on the same link or start.
+
+DEDUP_SIMILARITY = float(os.getenv("DEDUP_SIMILARITY", "0.85"))
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_title(title: str | None) -> str:
+    ascii_title = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode()
+    return " ".join(WORD.findall(ascii_title.lower()))
+
+
+def trigrams(text: str) -> frozenset:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def could_be_same(a, b) -> bool:
+    if a.organizer_id is None or a.organizer_id != b.organizer_id:
+        return True
+    same_link = a.canonical_link is not None and a.canonical_link == b.canonical_link
+    return same_link or a.start_datetime == b.start_datetime
+
+
+def find_duplicates(events) -> dict[int, int]:
+    # Returns {id: id of the original} for every event that duplicates another
+    blocks = defaultdict(list)
+    for event in events:
+        if event.start_datetime is not None:
+            blocks[(event.market_id, event.start_datetime.date())].append(event)
+
+    parent = {}
+
+    def root(id):
+        while parent.get(id, id) != id:
+            id = parent[id]
+        return id
+
+    for block in blocks.values():
+        if len(block) < 2:
+            continue
+        grams = [trigrams(normalize_title(event.title)) for event in block]
+        for i in range(len(block)):
+            for j in range(i + 1, len(block)):
+                if similarity(grams[i], grams[j]) >= DEDUP_SIMILARITY and could_be_same(block[i], block[j]):
+                    a, b = root(block[i].id), root(block[j].id)
+                    if a != b:
+                        parent[max(a, b)] = min(a, b)
+
+    groups = defaultdict(list)
+    for block in blocks.values():
+        for event in block:
+            groups[root(event.id)].append(event)
+
+    duplicates = {}
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda e: (e.created_at is None, e.created_at, e.id))
+        original = members[0].id
+        for event in members[1:]:
+            duplicates[event.id] = original
+    return duplicates
+
+
+async def flag_duplicates(db: AsyncSession, dates: set[date] | None = None) -> int:
+    # Re-evaluates the events starting on `dates` (all events when None) and
+    # updates duplicate_of on the ones whose status changed. Runs inside the
+    # caller's transaction; ORM writes so the change log records them.
+    await db.flush()
+
+    query = select(Event).where(Event.start_datetime.is_not(None))
+    if dates is not None:
+        if not dates:
+            return 0
+        query = query.where(func.date(Event.start_datetime).in_([d.isoformat() for d in dates]))
+    events = (await db.execute(query)).scalars().all()
+
+    duplicates = find_duplicates([event for event in events if event.valid])
+    changed = 0
+    for event in events:
+        duplicate_of = duplicates.get(event.id)
+        if event.duplicate_of != duplicate_of:
+            event.duplicate_of = duplicate_of
+            changed += 1
+
+    if changed:
+        print(f"🔍 {changed} events changed duplicate status")
+    return changed
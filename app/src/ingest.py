@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import importlib
+import json
+import os
+import time
+from datetime import datetime
+
+from cachetools import TTLCache
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from app.src.db.database import AsyncSessionLocal
+from app.src.dedup import flag_duplicates
+from app.src.db.dimensions import DIMENSIONS, assign_fields, dimension_id
+from app.src.db.models import Event, EventArchive
+from app.src.locks import ProcessLock
+from app.src.metrics import cache_requests_total, upsert_batch_size, upsert_seconds
+from app.src.scrape_health import ScrapeStats, record_run, retry_blocked_until, track_scrape
+from app.src.tracing import span, trace
+from app.src.urls import canonical_event_url, canonical_url
+from app.src.utils import deduplicate_events, load_config
+
+# Scraping and storing one site's events. Each site has at most one run in
+# flight: refresh requests that arrive while it runs attach to it, and for
+# SCRAPE_COOLDOWN_SECONDS after it finishes they get its result instead of
+# starting another scrape. Across worker processes a per-site file lock does
+# the same job, and a single writer lock serializes the upserts.
+
+SCRAPE_COOLDOWN_SECONDS = int(os.getenv("SCRAPE_COOLDOWN_SECONDS", "30"))
+
+refresh_tasks: dict[str, asyncio.Task] = {}
+recent_refreshes = TTLCache(maxsize=256, ttl=SCRAPE_COOLDOWN_SECONDS)
+
+
+def parse_datetime(dt_input) -> datetime | None:
+    if isinstance(dt_input, datetime):
+        return dt_input
+    if isinstance(dt_input, str) and dt_input.strip():
+        try:
+            return datetime.fromisoformat(dt_input)
+        except Exception as ex:
+            print(f"[WARNING] Failed to parse datetime string: '{dt_input}' — {ex}")
+    return None
+
+
+def scrape_site(site: str, stats: ScrapeStats) -> list:
+    # Scrapers use blocking requests/time.sleep, so this runs in the threadpool
+    config = load_config(site)
+    module = importlib.import_module(f"app.site.{site}")
+    with track_scrape(stats, module), span("process"):
+        events_raw = module.process(config)
+
+    with span("dedupe", scraped=len(events_raw)):
+        allowlist = config.get("url_query_allowlist")
+        for event in events_raw:
+            event["Canonical Link"] = canonical_url(event.get("Event Link"), allowlist)
+        events = deduplicate_events(events_raw)
+    stats.events = len(events)
+    return events
+
+
+def content_hash(e: dict, start_dt: datetime | None, end_dt: datetime | None) -> str:
+    # Fingerprint of what the scraper reported for an event. A refresh that
+    # reports the same content leaves the stored row untouched.
+    fields = [
+        e.get("Event Title"), e.get("Canonical Link"), e.get("Organizer"), e.get("Market"), e.get("Industry"),
+        start_dt and start_dt.isoformat(), end_dt and end_dt.isoformat(),
+    ]
+    return hashlib.sha1(json.dumps(fields).encode()).hexdigest()
+
+
+async def store_events(events: list) -> list[Event]:
+    stored_events = []
+    dimension_ids = {}
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "archived": 0}
+
+    async with AsyncSessionLocal() as db:
+        for e in events:
+            title = e.get("Event Title")
+            event_link = e.get("Event Link")
+            organizer = e.get("Organizer")
+            canonical_link = e.get("Canonical Link") or canonical_event_url(event_link, organizer)
+
+            if not (title and event_link and organizer):
+                continue  # skip incomplete
+
+            # Matched on the canonical link, so tracking parameters or a
+            # trailing slash do not turn a known event into a new one. The
+            # three are the table's unique key, so at most one row matches.
+            organizer_id = await dimension_id(db, DIMENSIONS["organizer"], organizer, dimension_ids)
+            result = await db.execute(
+                select(Event).filter_by(title=title, canonical_link=canonical_link, organizer_id=organizer_id)
+            )
+            existing = result.scalar_one_or_none()
+
+            if existing is None:
+                # Scrapers also list past events; once archived they stay there
+                # instead of coming back as new hot rows after every pass
+                archived = await db.execute(
+                    select(EventArchive.id)
+                    .filter_by(title=title, canonical_link=canonical_link, organizer_id=organizer_id)
+                    .limit(1)
+                )
+                if archived.first() is not None:
+                    counts["archived"] += 1
+                    continue
+
+            start_dt = parse_datetime(e.get("start_dt"))
+            end_dt = parse_datetime(e.get("end_dt"))
+            digest = content_hash({**e, "Canonical Link": canonical_link}, start_dt, end_dt)
+
+            if existing and existing.content_hash == digest:
+                counts["unchanged"] += 1
+                stored_events.append(existing)
+            elif existing:
+                counts["changed"] += 1
+                # Every hashed field is written, e.g. a site moving an event
+                # to another market
+                existing.start_datetime = start_dt
+                existing.end_datetime = end_dt
+                await assign_fields(
+                    db, existing, {"industry": e.get("Industry"), "market": e.get("Market")}, dimension_ids
+                )
+                existing.content_hash = digest
+                existing.updated_at = datetime.now()
+                stored_events.append(existing)
+            else:
+                counts["new"] += 1
+                new_event = Event(
+                    title=title,
+                    event_link=event_link,
+                    canonical_link=canonical_link,
+                    content_hash=digest,
+                    start_datetime=start_dt,
+                    end_datetime=end_dt,
+                    created_at=datetime.now(),
+                    updated_at=datetime.now(),
+                    valid=True,
+                )
+                await assign_fields(
+                    db,
+                    new_event,
+                    {"organizer": organizer, "industry": e.get("Industry"), "market": e.get("Market")},
+                    dimension_ids,
+                )
+                db.add(new_event)
+                stored_events.append(new_event)
+
+        # Other sources may list the same events; check the days touched
+        with span("cross_source_dedupe"):
+            await flag_duplicates(db, {e.start_datetime.date() for e in stored_events if e.start_datetime})
+        with span("commit"):
+            await db.commit()
+
+    print(
+        f"💾 {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged, "
+        f"{counts['archived']} already archived events"
+    )
+
+    return stored_events
+
+
+async def load_events(ids: list[int]) -> list[Event]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Event).where(Event.id.in_(ids)))
+        return list(result.scalars())
+
+
+async def _refresh_site(site: str) -> list[Event]:
+    site_lock = ProcessLock(f"scrape-{site}")
+    await run_in_threadpool(site_lock.acquire)
+    try:
+        # Another worker may have scraped the site while this one waited
+        last_run = json.loads(site_lock.read() or "{}")
+        if time.time() - last_run.get("finished", 0) < SCRAPE_COOLDOWN_SECONDS:
+            print(f"♻️ {site} was just refreshed by another worker, reusing that run")
+            return await load_events(last_run["ids"])
+
+        retry_at = await retry_blocked_until(site)
+        if retry_at:
+            print(f"⏭️ {site} has been failing, not scraping it again before {retry_at:%Y-%m-%d %H:%M}")
+            return []
+
+        with trace("refresh", site=site):
+            stats = ScrapeStats(site)
+            try:
+                events = await run_in_threadpool(scrape_site, site, stats)
+            except Exception:
+                if stats.error:  # failed inside the site module, worth a ledger entry
+                    await record_run(stats)
+                raise
+            await record_run(stats)
+
+            writer_lock = ProcessLock("writer")
+            with span("wait_writer"):
+                await run_in_threadpool(writer_lock.acquire)
+            try:
+                upsert_batch_size.observe(len(events))
+                with upsert_seconds.time(), span("upsert", events=len(events)):
+                    stored_events = await store_events(events)
+            finally:
+                writer_lock.release()
+
+        site_lock.write(json.dumps({"finished": time.time(), "ids": [e.id for e in stored_events]}))
+        return stored_events
+    finally:
+        site_lock.release()
+
+
+def _finish_refresh(site: str, task: asyncio.Task):
+    del refresh_tasks[site]
+    # Failed runs are not remembered, so the next request tries again
+    if not task.cancelled() and task.exception() is None:
+        recent_refreshes[site] = task.result()
+
+
+async def refresh_site(site: str) -> list[Event]:
+    if not site.isidentifier():
+        raise ValueError(f"Invalid site name: {site!r}")
+
+    if site in recent_refreshes:
+        cache_requests_total.inc("refresh", "hit")
+        print(f"♻️ {site} refreshed less than {SCRAPE_COOLDOWN_SECONDS}s ago, reusing that run")
+        return recent_refreshes[site]
+
+    task = refresh_tasks.get(site)
+    if task is None:
+        # A task of its own, so the run survives the request that started it
+        # being cancelled while others are still waiting on it
+        cache_requests_total.inc("refresh", "miss")
+        task = asyncio.create_task(_refresh_site(site))
+        refresh_tasks[site] = task
+        task.add_done_callback(lambda t: _finish_refresh(site, t))
+    else:
+        cache_requests_total.inc("refresh", "shared")
+        print(f"⏳ {site} is already being refreshed, waiting for that run")
+
+    return await asyncio.shield(task)
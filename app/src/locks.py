@@ -0,0 +1,57 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows dev runs are a single process anyway
+    fcntl = None
+
+# Advisory file locks shared by every worker process on the same data
+# directory. Used so only one process archives, migrates, or writes scraped
+# events at a time. The lock file can also hold a little state for the next
+# holder, e.g. when a site was last scraped.
+
+LOCK_DIR = os.path.join("app/data", "locks")
+os.makedirs(LOCK_DIR, exist_ok=True)
+
+
+class ProcessLock:
+    def __init__(self, name: str):
+        self.path = os.path.join(LOCK_DIR, f"{name}.lock")
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        # Blocks the calling thread; run it in the threadpool from async code
+        file = open(self.path, "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                file.close()
+                return False
+        self._file = file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def read(self) -> str:
+        self._file.seek(0)
+        return self._file.read()
+
+    def write(self, text: str):
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(text)
+        self._file.flush()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,133 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process counters and histograms rendered in the Prometheus text format
+# by GET /metrics. Updates are a dict lookup and an add under a per-metric
+# lock, cheap enough for the request path and for the scraping threads.
+# Each worker process keeps its own numbers; scrape every worker, or run
+# the exporter with WEB_CONCURRENCY=1, for complete totals.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SCRAPE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+REGISTRY = []
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.extend(self.render_sample(label_values, value))
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render_sample(self, label_values, value):
+        return [f"{self.name}{format_labels(self.labels, label_values)} {format_value(value)}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def render_sample(self, label_values, state):
+        counts, total = state[0][:], state[1]
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{format_labels(self.labels, label_values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{format_labels(self.labels, label_values)} {format_value(total)}")
+        lines.append(f"{self.name}_count{format_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# API
+events_request_seconds = Histogram(
+    "events_request_seconds", "GET /events latency by the set of filters used", ("filters",)
+)
+events_serialize_seconds = Histogram("events_serialize_seconds", "Encoding GET /events rows to JSON")
+db_query_seconds = Histogram("db_query_seconds", "SQL statement execution time", ("statement",))
+cache_requests_total = Counter(
+    "cache_requests_total", "Cache lookups; result is hit, shared (joined an in-flight miss) or miss",
+    ("cache", "result"),
+)
+
+# Scraping
+scrape_http_request_seconds = Histogram(
+    "scrape_http_request_seconds", "HTTP fetch latency of site scrapers", ("host",)
+)
+scrape_http_responses_total = Counter(
+    "scrape_http_responses_total", "HTTP responses seen by site scrapers", ("host", "status")
+)
+scrape_seconds = Histogram("scrape_seconds", "Wall time of a site scrape", ("site",), SCRAPE_BUCKETS)
+scrape_parse_seconds = Histogram(
+    "scrape_parse_seconds", "Time a site scrape spent outside HTTP fetches and polite sleeps", ("site",),
+    SCRAPE_BUCKETS,
+)
+upsert_batch_size = Histogram("upsert_batch_size", "Scraped events per store batch", buckets=SIZE_BUCKETS)
+upsert_seconds = Histogram("upsert_seconds", "Storing one batch of scraped events")
@@ -0,0 +1,267 @@
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import requests
+from sqlalchemy import select
+
+from app.src.db.database import AsyncSessionLocal
+from app.src.db.models import ScrapeRun
+from app.src.metrics import scrape_http_request_seconds, scrape_http_responses_total, scrape_parse_seconds, scrape_seconds
+from app.src.tracing import span
+
+# Per-site scrape ledger. While a site module runs, its HTTP responses and
+# its tagged log lines ("[WARN] ...", "[ERROR] ...") are counted for that run
+# only, and get_event_list / get_event_details are wrapped where the module
+# has them. Each run is stored as a ScrapeRun and compared with the median of
+# the site's trailing runs, so a redesign that quietly yields nothing shows up
+# as "empty" or "drop" on the next refresh instead of weeks later.
+
+SCRAPE_BASELINE_RUNS = int(os.getenv("SCRAPE_BASELINE_RUNS", "10"))
+SCRAPE_DROP_RATIO = float(os.getenv("SCRAPE_DROP_RATIO", "0.5"))
+# After this many empty or failed runs in a row a site is only retried once
+# every SCRAPE_BROKEN_RETRY_HOURS
+SCRAPE_BROKEN_AFTER = int(os.getenv("SCRAPE_BROKEN_AFTER", "3"))
+SCRAPE_BROKEN_RETRY_HOURS = float(os.getenv("SCRAPE_BROKEN_RETRY_HOURS", "6"))
+
+LOG_TAG = re.compile(r"^\[(WARN|WARNING|ERROR)\]\s*(.*)")
+FAILURE_STAGES = [
+    ("fetch", re.compile(r"fetch|request|status|timeout|connect", re.IGNORECASE)),
+    ("datetime", re.compile(r"date|time", re.IGNORECASE)),
+    ("selector", re.compile(r"not found|no .* found|missing|not enough|find|selector|tag", re.IGNORECASE)),
+]
+
+current_run: ContextVar["ScrapeStats | None"] = ContextVar("current_run", default=None)
+
+
+class ScrapeStats:
+    def __init__(self, site: str):
+        self.site = site
+        self.started_at = datetime.now()
+        self.duration_seconds = None
+        self.events = None
+        self.list_count = None
+        self.detail_ok = None
+        self.detail_failed = None
+        self.parse_failures = Counter()
+        self.http_statuses = Counter()
+        self.http_requests = 0
+        self.bytes = 0
+        self.http_seconds = 0.0
+        self.sleep_seconds = 0.0
+        self.error = None
+        self._partial = ""
+
+    def log(self, text: str):
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            match = LOG_TAG.match(line.strip())
+            if match:
+                message = match.group(2)
+                stage = next((name for name, pattern in FAILURE_STAGES if pattern.search(message)), "other")
+                self.parse_failures[stage] += 1
+
+    def response(self, status: str, size: int, seconds: float):
+        self.http_requests += 1
+        self.http_seconds += seconds
+        self.http_statuses[status] += 1
+        self.bytes += size
+
+    def listed(self, events):
+        self.list_count = (self.list_count or 0) + len(events or [])
+
+    def detail(self, ok: bool):
+        self.detail_ok = (self.detail_ok or 0) + ok
+        self.detail_failed = (self.detail_failed or 0) + (not ok)
+
+
+class LogTap:
+    # Stands in for sys.stdout; lines printed from inside a tracked scrape
+    # are also fed to that run's stats. Other threads print as before.
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        stats = current_run.get()
+        if stats is not None:
+            stats.log(text)
+        return self._stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+_install_lock = threading.Lock()
+_send = requests.Session.send
+
+
+def _tracked_send(session, request, **kwargs):
+    stats = current_run.get()
+    if stats is None:
+        return _send(session, request, **kwargs)
+    host = urlsplit(request.url).hostname or ""
+    status, size = "error", 0
+    start = time.perf_counter()
+    try:
+        with span("fetch", host=host, url=request.url) as fetch:
+            response = _send(session, request, **kwargs)
+            status = str(response.status_code)
+            size = 0 if kwargs.get("stream") else len(response.content)
+            if fetch is not None:
+                fetch.attrs.update(status=status, bytes=size)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.response(status, size, elapsed)
+        scrape_http_request_seconds.observe(elapsed, host)
+        scrape_http_responses_total.inc(host, status)
+    return response
+
+
+def install():
+    with _install_lock:
+        if not isinstance(sys.stdout, LogTap):
+            sys.stdout = LogTap(sys.stdout)
+        requests.Session.send = _tracked_send
+
+
+class TrackedTime:
+    # Stands in for a site module's `time` during a run so its polite
+    # time.sleep() calls are not counted as parsing
+    def __init__(self, stats):
+        self._stats = stats
+
+    def sleep(self, seconds):
+        self._stats.sleep_seconds += seconds
+        with span("sleep"):
+            time.sleep(seconds)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def _wrap_list(stats, func):
+    def get_event_list(*args, **kwargs):
+        with span("list"):
+            events = func(*args, **kwargs)
+        stats.listed(events)
+        return events
+    return get_event_list
+
+
+def _wrap_detail(stats, func):
+    def get_event_details(*args, **kwargs):
+        try:
+            with span("detail"):
+                details = func(*args, **kwargs)
+        except Exception:
+            stats.detail(False)
+            raise
+        stats.detail(bool(details))
+        return details
+    return get_event_details
+
+
+@contextmanager
+def track_scrape(stats: ScrapeStats, module):
+    # Runs in the scraping thread. A site has one scrape in flight per
+    # process, so swapping its module functions for the run is safe.
+    install()
+    wrappers = {"get_event_list": _wrap_list, "get_event_details": _wrap_detail}
+    originals = {name: getattr(module, name) for name in wrappers if callable(getattr(module, name, None))}
+    for name, func in originals.items():
+        setattr(module, name, wrappers[name](stats, func))
+    if getattr(module, "time", None) is time:
+        originals["time"] = time
+        module.time = TrackedTime(stats)
+
+    token = current_run.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    except Exception as e:
+        stats.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        stats.duration_seconds = round(duration, 3)
+        current_run.reset(token)
+        scrape_seconds.observe(duration, stats.site)
+        scrape_parse_seconds.observe(max(duration - stats.http_seconds - stats.sleep_seconds, 0), stats.site)
+        for name, func in originals.items():
+            setattr(module, name, func)
+
+
+def classify(stats: ScrapeStats, baseline: float | None) -> str:
+    if stats.error:
+        return "error"
+    if not stats.events:
+        # Nothing to compare with yet: only a failing run counts as empty
+        if baseline or stats.detail_failed or sum(stats.parse_failures.values()):
+            return "empty"
+        return "ok"
+    if baseline and stats.events < baseline * SCRAPE_DROP_RATIO:
+        return "drop"
+    return "ok"
+
+
+async def record_run(stats: ScrapeStats) -> ScrapeRun:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ScrapeRun.events)
+            .where(ScrapeRun.site == stats.site, ScrapeRun.status != "error")
+            .order_by(ScrapeRun.id.desc())
+            .limit(SCRAPE_BASELINE_RUNS)
+        )
+        history = result.scalars().all()
+        baseline = statistics.median(history) if history else None
+        status = classify(stats, baseline)
+
+        run = ScrapeRun(
+            site=stats.site,
+            started_at=stats.started_at,
+            duration_seconds=stats.duration_seconds,
+            status=status,
+            events=stats.events,
+            baseline=baseline,
+            list_count=stats.list_count,
+            detail_ok=stats.detail_ok,
+            detail_failed=stats.detail_failed,
+            parse_failures=dict(stats.parse_failures),
+            http_statuses=dict(stats.http_statuses),
+            http_requests=stats.http_requests,
+            bytes=stats.bytes,
+            error=stats.error,
+        )
+        db.add(run)
+        await db.commit()
+
+    if status != "ok":
+        print(f"[WARNING] {stats.site} scrape flagged as {status}: {stats.events} events, baseline {baseline}")
+    return run
+
+
+async def retry_blocked_until(site: str) -> datetime | None:
+    # When the site's last SCRAPE_BROKEN_AFTER runs were all empty or failed,
+    # the time before which it is not worth scraping again
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ScrapeRun.status, ScrapeRun.started_at)
+            .where(ScrapeRun.site == site)
+            .order_by(ScrapeRun.id.desc())
+            .limit(SCRAPE_BROKEN_AFTER)
+        )
+        runs = result.all()
+
+    if len(runs) < SCRAPE_BROKEN_AFTER or any(status not in ("empty", "error") for status, _ in runs):
+        return None
+    retry_at = runs[0].started_at + timedelta(hours=SCRAPE_BROKEN_RETRY_HOURS)
+    return retry_at if retry_at > datetime.now() else None
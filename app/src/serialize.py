@@ -0,0 +1,82 @@
+from datetime import datetime
+from functools import lru_cache
+from json.encoder import encode_basestring
+from typing import get_args
+
+from app.src.db.schemas import EventResponse
+
+# Serializes EventResponse-shaped row tuples straight to JSON, skipping ORM
+# hydration and pydantic validation. Output is byte-for-byte what
+# TypeAdapter(List[EventResponse]).dump_json produces for the same rows.
+
+
+def encode_str(value) -> str:
+    return "null" if value is None else encode_basestring(value)
+
+
+def encode_int(value) -> str:
+    return "null" if value is None else str(value)
+
+
+def encode_bool(value) -> str:
+    return "null" if value is None else ("true" if value else "false")
+
+
+def encode_datetime(value) -> str:
+    # Takes the raw SQLite text ("YYYY-MM-DD HH:MM:SS.ffffff") when the column
+    # was selected as a string; pydantic omits all-zero microseconds.
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        if len(value) == 26 and value[10] == " ":
+            if value.endswith(".000000"):
+                return f'"{value[:10]}T{value[11:19]}"'
+            return f'"{value[:10]}T{value[11:]}"'
+        value = datetime.fromisoformat(value)
+    return f'"{value.isoformat()}"'
+
+
+def csv_value(encode, value) -> str:
+    # Same text as the JSON output, unquoted; NULL becomes an empty cell
+    if value is None:
+        return ""
+    if encode is encode_str:
+        return value
+    if encode is encode_datetime:
+        return encode(value)[1:-1]
+    return encode(value)
+
+
+ENCODERS_BY_TYPE = {str: encode_str, int: encode_int, bool: encode_bool, datetime: encode_datetime}
+
+FIELD_ENCODERS = {
+    name: ENCODERS_BY_TYPE[next(t for t in (info.annotation, *get_args(info.annotation)) if t in ENCODERS_BY_TYPE)]
+    for name, info in EventResponse.model_fields.items()
+}
+
+DATETIME_FIELDS = {name for name, encoder in FIELD_ENCODERS.items() if encoder is encode_datetime}
+
+
+class RowEncoder:
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self._keys = [f'"{name}":' for name in self.fields]
+        self._encoders = [FIELD_ENCODERS[name] for name in self.fields]
+
+    def encode_row(self, row) -> str:
+        return "{" + ",".join([key + encode(value) for key, encode, value in zip(self._keys, self._encoders, row)]) + "}"
+
+    def csv_row(self, row) -> list:
+        return [csv_value(encode, value) for encode, value in zip(self._encoders, row)]
+
+    def encode_rows(self, rows) -> bytes:
+        encode_row = self.encode_row
+        return ("[" + ",".join([encode_row(row) for row in rows]) + "]").encode()
+
+
+event_encoder = RowEncoder(EventResponse.model_fields)
+
+
+@lru_cache(maxsize=64)
+def encoder_for(fields: tuple) -> RowEncoder:
+    return RowEncoder(fields)
@@ -0,0 +1,40 @@
+import os
+
+import uvicorn
+
+from app.src.db.database import init_db
+
+# Production entry point: `python -m app.src.serve`. Runs WEB_CONCURRENCY
+# worker processes (default: one per CPU) on uvloop + httptools without the
+# reload file watcher. Workers share app/data: SQLite runs in WAL mode, file
+# locks keep archiving and scraped-event writes to one process at a time,
+# and each worker follows the change log so caches and SSE streams see the
+# other workers' writes. web.py stays the reloading dev server.
+#
+# GET /events?limit=50 (~23 kB JSON from the response cache), 64 keep-alive
+# connections, load generator sharing a single-CPU container:
+#   uvicorn --reload, asyncio + h11 (previous Dockerfile)   ~750 req/s
+#   serve.py, uvloop + httptools, 1 worker                  ~950 req/s
+#   serve.py, 2 workers                                     ~820 req/s
+# On one core extra workers only add contention. The gain from workers comes
+# with one CPU per worker, which is what WEB_CONCURRENCY defaults to.
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WORKERS = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+
+if __name__ == "__main__":
+    # Migrate once up front instead of racing on it as the workers start
+    init_db()
+    uvicorn.run(
+        "app.src.web:app",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        loop="uvloop",
+        http="httptools",
+        reload=False,
+        proxy_headers=True,
+        timeout_graceful_shutdown=10,  # SSE streams never end on their own
+    )
@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+# Nested timing spans for site refreshes. trace() opens a root span and
+# span() adds children to whatever trace is current in the context, so
+# spans opened in the scraping thread (run_in_threadpool copies the context)
+# land under the refresh that started it. Outside a trace span() does
+# nothing. Each finished trace is written to TRACE_DIR in the Chrome trace
+# format (open it in Perfetto or chrome://tracing) with a per-stage summary
+# in "otherData", which GET /traces lists.
+
+TRACE_DIR = os.path.join("app/data", "traces")
+TRACE_KEEP = int(os.getenv("TRACE_KEEP", "50"))  # 0 turns tracing off
+os.makedirs(TRACE_DIR, exist_ok=True)
+
+current_trace: ContextVar["Trace | None"] = ContextVar("current_trace", default=None)
+current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "parent", "thread", "start", "end")
+
+    def __init__(self, name: str, attrs: dict, parent: "Span | None"):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end = None
+
+
+class Trace:
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.started_at = datetime.now()
+        self.spans: list[Span] = []
+
+    def summary(self) -> dict:
+        root = self.spans[-1]  # finished last
+        child_time = defaultdict(float)
+        for span in self.spans:
+            if span.parent is not None:
+                child_time[span.parent] += span.end - span.start
+
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span.name, {"name": span.name, "count": 0, "total_ms": 0.0, "self_ms": 0.0})
+            stage["count"] += 1
+            stage["total_ms"] += (span.end - span.start) * 1000
+            stage["self_ms"] += (span.end - span.start - child_time[span]) * 1000
+        for stage in stages.values():
+            stage["total_ms"] = round(stage["total_ms"], 3)
+            stage["self_ms"] = round(stage["self_ms"], 3)
+
+        ordered = sorted(stages.values(), key=lambda s: -s["self_ms"])
+        return {
+            "name": self.name,
+            **self.attrs,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round((root.end - root.start) * 1000, 3),
+            "slowest": ordered[0]["name"],
+            "stages": ordered,
+        }
+
+    def chrome_trace(self) -> dict:
+        origin = self.spans[-1].start
+        threads = {}
+        events = []
+        for span in self.spans:
+            events.append({
+                "name": span.name,
+                "ph": "X",
+                "ts": round((span.start - origin) * 1e6, 1),
+                "dur": round((span.end - span.start) * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": threads.setdefault(span.thread, len(threads) + 1),
+                "args": {key: str(value) for key, value in span.attrs.items()},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": self.summary()}
+
+    def export(self):
+        stamp = self.started_at.strftime("%Y%m%dT%H%M%S%f")
+        label = "-".join(str(value) for value in self.attrs.values())
+        path = os.path.join(TRACE_DIR, f"{stamp}-{self.name}{'-' + label if label else ''}.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(self.chrome_trace(), file)
+        os.replace(path + ".tmp", path)
+
+        # Other workers write here too; keep the newest TRACE_KEEP overall
+        for old in sorted(os.listdir(TRACE_DIR))[:-TRACE_KEEP]:
+            try:
+                os.remove(os.path.join(TRACE_DIR, old))
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def span(name: str, **attrs):
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = Span(name, attrs, current_span.get())
+    token = current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.end = time.perf_counter()
+        current_span.reset(token)
+        trace.spans.append(current)
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    if TRACE_KEEP <= 0 or current_trace.get() is not None:
+        with span(name, **attrs) as root:
+            yield root
+        return
+
+    current = Trace(name, attrs)
+    token = current_trace.set(current)
+    try:
+        with span(name, **attrs) as root:
+            yield root
+    finally:
+        current_trace.reset(token)
+        try:
+            current.export()
+        except OSError as e:
+            print(f"[WARNING] Could not write trace for {name}: {e}")
+
+
+def trace_summaries(limit: int = 20, site: str | None = None) -> list[dict]:
+    summaries = []
+    for file_name in sorted(os.listdir(TRACE_DIR), reverse=True):
+        if not file_name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(TRACE_DIR, file_name)) as file:
+                summary = json.load(file)["otherData"]
+        except (OSError, ValueError, KeyError):
+            continue  # pruned or still being written by another worker
+        if site is not None and summary.get("site") != site:
+            continue
+        summaries.append({"id": file_name[:-5], **summary})
+        if len(summaries) >= limit:
+            break
+    return summaries
@@ -0,0 +1,62 @@
+import re
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+from app.src.utils import query_allowlists
+
+# Canonical form of event links, used for event identity and dedup. Scraped
+# links keep their original text in event_link; canonical_link is what gets
+# compared.
+
+TRACKING_PARAMS = re.compile(
+    r"^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|_gl|_hsenc|_hsmi|ref)$",
+    re.IGNORECASE,
+)
+PATH_SAFE = "/:@!$&'()*+,;=-._~"
+
+
+def canonical_url(url: str | None, query_allowlist: list[str] | None = None) -> str | None:
+    # Lowercases scheme and host, treats http as https, drops "www.", default
+    # ports, fragments, repeated or trailing slashes and tracking parameters,
+    # and sorts what is left of the query. With `query_allowlist` (from the
+    # site's config) only those parameters are kept. Route fragments ("#!..."
+    # or "#/...") are kept: single-page sites such as thetbra.com put the
+    # event itself there.
+    if not url:
+        return url
+
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return url.strip()
+
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+
+    path = quote(unquote(re.sub(r"/{2,}", "/", parts.path)), safe=PATH_SAFE)
+    path = path.rstrip("/") or "/"
+
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if query_allowlist is not None:
+        params = [(k, v) for k, v in params if k in query_allowlist]
+    else:
+        params = [(k, v) for k, v in params if not TRACKING_PARAMS.match(k)]
+    query = urlencode(sorted(params))
+
+    fragment = parts.fragment.rstrip("/") if parts.fragment.startswith(("!", "/")) else ""
+
+    return urlunsplit((scheme, netloc, path, query, fragment))
+
+
+def canonical_event_url(url: str | None, organizer: str | None) -> str | None:
+    # canonical_url() with the allow-list of the organizer's site, for links
+    # that do not come straight from a scrape
+    return canonical_url(url, query_allowlists().get(organizer))
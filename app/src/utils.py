@@ -1,8 +1,18 @@
+import glob
 import json
 import os
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
 
 CONFIG_DIR = "app/config"
 
+# Relative times ("now", "now-1h", "now+7d") are floored to this many seconds
+# so that requests made moments apart resolve to the same value.
+TIME_BUCKET_SECONDS = int(os.getenv("TIME_BUCKET_SECONDS", "300"))
+RELATIVE_TIME = re.compile(r"^now(?:([+\- ])(\d+)([smhdw]))?$")
+TIME_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
 def deduplicate_events(events):
     seen = set()
     unique_events = []
@@ -10,7 +20,7 @@ def deduplicate_events(events):
     for event in events:
         key = (
             event.get("Event Title", "").strip().lower(),
-            event.get("Event Link", "").strip().lower(),
+            (event.get("Canonical Link") or event.get("Event Link", "")).strip().lower(),
         )
         if key not in seen:
             seen.add(key)
@@ -29,3 +39,39 @@ def load_config(site_name):
         )
     with open(config_path, "r") as f:
         return json.load(f)
+
+
+@lru_cache(maxsize=1)
+def query_allowlists() -> dict:
+    # organizer -> url_query_allowlist, for links whose site is not known
+    # (stored rows, manual edits). Taken from the site configs that set one.
+    allowlists = {}
+    for path in sorted(glob.glob(os.path.join(CONFIG_DIR, "*.json"))):
+        with open(path) as f:
+            config = json.load(f)
+        if "url_query_allowlist" in config:
+            allowlists[config.get("organizer")] = config["url_query_allowlist"]
+    return allowlists
+
+
+def bucketed_now(bucket_seconds=TIME_BUCKET_SECONDS):
+    now = datetime.now()
+    return datetime.fromtimestamp(now.timestamp() // bucket_seconds * bucket_seconds)
+
+
+def parse_time_param(value):
+    # Accepts an ISO datetime or a relative expression such as "now-1h".
+    # A "+" that arrived unencoded in a query string decodes to a space.
+    if value is None or not value.strip():
+        return None
+
+    match = RELATIVE_TIME.match(value.strip().lower())
+    if not match:
+        return datetime.fromisoformat(value.strip())
+
+    sign, amount, unit = match.groups()
+    if sign is None:
+        return bucketed_now()
+
+    offset = timedelta(**{TIME_UNITS[unit]: int(amount)})
+    return bucketed_now() - offset if sign == "-" else bucketed_now() + offset
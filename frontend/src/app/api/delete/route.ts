@@ -41,3 +41,42 @@ export async function DELETE(request: NextRequest) {
     );
   }
 }
+
+// Delete many events at once: body is { ids: number[] }
+export async function POST(request: NextRequest) {
+  const { ids } = await request.json();
+
+  if (!Array.isArray(ids) || ids.length === 0) {
+    return NextResponse.json(
+      { error: 'Event IDs are required' },
+      { status: 400 }
+    );
+  }
+
+  try {
+    const res = await fetch(`${apiURL}/events/delete`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(ids),
+    });
+
+    if (!res.ok) {
+      const err = await res.text();
+      return NextResponse.json(
+        { error: `Failed to delete events: ${err}` },
+        { status: res.status }
+      );
+    }
+
+    const data = await res.json();
+    return NextResponse.json(data, { status: 200 });
+  } catch (error) {
+    console.error('POST delete error:', error);
+    return NextResponse.json(
+      { error: 'Server error' },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,42 @@
+import { NextRequest } from 'next/server';
+
+const apiURL = process.env.NEXT_PUBLIC_API_URL || 'http://backend:8000';
+
+// Per-day or per-week counts and summaries for the calendar view
+export async function GET(req: NextRequest) {
+  const params = req.nextUrl.searchParams.toString();
+
+  const headers: Record<string, string> = {};
+  const ifNoneMatch = req.headers.get('if-none-match');
+  if (ifNoneMatch) {
+    headers['If-None-Match'] = ifNoneMatch;
+  }
+
+  try {
+    const res = await fetch(`${apiURL}/events/calendar?${params}`, {
+      method: 'GET',
+      headers,
+      cache: 'no-store',
+    });
+
+    const validators: Record<string, string> = {};
+    for (const name of ['etag', 'last-modified', 'cache-control']) {
+      const value = res.headers.get(name);
+      if (value) validators[name] = value;
+    }
+
+    if (res.status === 304) {
+      return new Response(null, { status: 304, headers: validators });
+    }
+
+    if (!res.ok) {
+      return new Response('Failed to fetch calendar', { status: res.status });
+    }
+
+    const data = await res.json();
+    return Response.json(data, { headers: validators });
+  } catch (error) {
+    console.error('Calendar API error:', error);
+    return new Response('Server error', { status: 500 });
+  }
+}
@@ -12,6 +12,9 @@ export async function GET(req: NextRequest) {
     valid: "valid",
     start_after: "start_after",
     start_before: "start_before",
+    window: "window",
+    include_archived: "include_archived",
+    fields: "fields",
     sort_by: "sort",
     sort_order: "order",
     limit: "limit",
@@ -26,20 +29,36 @@ export async function GET(req: NextRequest) {
     }
   }
 
+  // Pass the browser's validator through so unchanged lists come back as 304
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+  const ifNoneMatch = req.headers.get('if-none-match');
+  if (ifNoneMatch) {
+    headers['If-None-Match'] = ifNoneMatch;
+  }
+
   try {
     const res = await fetch(`${apiURL}/events?${params.toString()}`, {
       method: 'GET',
-      headers: {
-        'Content-Type': 'application/json',
-      },
+      headers,
+      cache: 'no-store',
     });
 
+    const validators: Record<string, string> = {};
+    for (const name of ['etag', 'last-modified', 'cache-control']) {
+      const value = res.headers.get(name);
+      if (value) validators[name] = value;
+    }
+
+    if (res.status === 304) {
+      return new Response(null, { status: 304, headers: validators });
+    }
+
     if (!res.ok) {
       return new Response('Failed to fetch events', { status: res.status });
     }
 
     const data = await res.json();
-    return Response.json(data);
+    return Response.json(data, { headers: validators });
   } catch (error) {
     console.error('API error:', error);
     return new Response('Server error', { status: 500 });
@@ -107,3 +126,36 @@ export async function PUT(request: NextRequest) {
     return new Response('Server error', { status: 500 });
   }
 }
+
+// Update many events at once: body is a list of { id, ...fields }
+export async function PATCH(request: NextRequest) {
+
+  try {
+    const body = await request.json();
+
+    const updates = body.map(({ created_at, updated_at, ...updateData }: Record<string, unknown>) => updateData);
+
+    const res = await fetch(`${apiURL}/events`, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(updates),
+    });
+
+    if (!res.ok) {
+      const errorData = await res.json();
+      console.error('FastAPI error:', errorData);
+      return new Response(JSON.stringify(errorData), {
+        status: res.status,
+        headers: { 'Content-Type': 'application/json' },
+      });
+    }
+
+    const data = await res.json();
+    return Response.json(data);
+  } catch (error) {
+    console.error('Next.js PATCH error:', error);
+    return new Response('Server error', { status: 500 });
+  }
+}
@@ -239,10 +239,15 @@ const EventEditTable = forwardRef<EventTableRef, EventTableProps>(({
           params.set('organizer', selectedOrganizer);
         }
 
+        // Let the API resolve "now" into a coarse bucket so repeated loads share a cache key
         if (eventTimeFilter === 'upcoming-events') {
-          params.set('start_after', new Date().toISOString());
+          params.set('window', 'upcoming');
         } else if (eventTimeFilter === 'past-events') {
-          params.set('start_before', new Date().toISOString());
+          params.set('window', 'past');
+        }
+        // Past events move to the archive table; history views read it too
+        if (eventTimeFilter === 'past-events' || eventTimeFilter === 'all-events') {
+          params.set('include_archived', 'true');
         }
 
         const res = await fetch(`/api/events?${params.toString()}`);
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.src.db.archive import archive_past_events
+from app.src.db.migrations import migrate_events_autoincrement
+from app.src.db.models import Base, Event, EventArchive
+
+PAST = datetime.now() - timedelta(days=400)
+
+
+def test_archived_ids_are_not_reused(tmp_path):
+    path = tmp_path / "events.db"
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    Session = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def archive_twice():
+        async with Session() as db:
+            db.add_all([Event(title="First", start_datetime=PAST), Event(title="Second", start_datetime=PAST)])
+            await db.commit()
+            assert await archive_past_events(db, days=30) == 2
+
+            # Used to get id 2 again and replace "Second" in the archive
+            db.add(Event(title="Third", start_datetime=PAST))
+            await db.commit()
+            assert await archive_past_events(db, days=30) == 1
+
+            result = await db.execute(select(EventArchive.id, EventArchive.title).order_by(EventArchive.id))
+            rows = result.all()
+        await async_engine.dispose()
+        return rows
+
+    assert asyncio.run(archive_twice()) == [(1, "First"), (2, "Second"), (3, "Third")]
+
+
+def test_migration_starts_ids_above_the_archive(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t.name != "events"])
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE events (id INTEGER NOT NULL PRIMARY KEY, title VARCHAR)"))
+        conn.execute(text("INSERT INTO events (id, title) VALUES (5, 'Hot')"))
+        conn.execute(text("INSERT INTO events_archive (id, title) VALUES (9, 'Archived')"))
+        migrate_events_autoincrement(conn)
+
+    with engine.begin() as conn:
+        assert "AUTOINCREMENT" in conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'events'")).scalar()
+        conn.execute(text("INSERT INTO events (title) VALUES ('New')"))
+        rows = conn.execute(text("SELECT id, title FROM events ORDER BY id")).all()
+
+    assert rows == [(5, "Hot"), (10, "New")]
@@ -0,0 +1,59 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.src.dedup import find_duplicates, normalize_title, similarity, trigrams
+
+ORL = 1
+AAGO, BOMA_ORL, FLCCIM = 10, 11, 12
+
+
+def event(id, title, organizer_id, start, link):
+    return SimpleNamespace(
+        id=id, title=title, organizer_id=organizer_id, market_id=ORL, start_datetime=start,
+        canonical_link=link, created_at=datetime(2025, 1, id),
+    )
+
+
+def score(a, b):
+    return similarity(trigrams(normalize_title(a.title)), trigrams(normalize_title(b.title)))
+
+
+def test_same_event_from_another_feed_is_flagged():
+    original = event(
+        1, "2025 Thanks For Giving Luncheon", AAGO, datetime(2025, 11, 19, 11),
+        "https://www.aagofoundation.org/events/2025thanksforgiving",
+    )
+    listed = event(
+        2, "2025 Thanks for Giving Luncheon - AAGO", BOMA_ORL, datetime(2025, 11, 19, 11, 30),
+        "https://www.bomaorlando.org/events/aago-thanks-for-giving",
+    )
+    assert find_duplicates([original, listed]) == {2: 1}
+
+
+def test_series_from_one_organizer_is_not_flagged():
+    pairs = [
+        ("Legislative Update Breakfast Session 1", "Legislative Update Breakfast Session 2"),
+        ("CCIM 101: Intro to Commercial Real Estate - Day 1", "CCIM 101: Intro to Commercial Real Estate - Day 2"),
+        ("Women in Commercial Real Estate Luncheon - March", "Women in Commercial Real Estate Luncheon - May"),
+    ]
+    for n, (first, second) in enumerate(pairs):
+        a = event(2 * n + 1, first, FLCCIM, datetime(2025, 5, 22, 8), f"https://www.flccim.com/events/{2 * n + 1}")
+        b = event(2 * n + 2, second, FLCCIM, datetime(2025, 5, 22, 13), f"https://www.flccim.com/events/{2 * n + 2}")
+        assert score(a, b) >= 0.85
+        assert find_duplicates([a, b]) == {}
+
+
+def test_one_organizer_listing_twice_is_flagged():
+    start = datetime(2025, 5, 22, 11)
+    link = "https://www.flccim.com/events/flccim-2025-legislative-session-update/"
+    same_link = [
+        event(1, "FLCCIM 2025 Legislative Session Update", FLCCIM, start, link),
+        event(2, "FLCCIM 2025 Legislative Session Update!", FLCCIM, datetime(2025, 5, 22, 12), link),
+    ]
+    assert find_duplicates(same_link) == {2: 1}
+
+    same_start = [
+        event(3, "Legislative Update Breakfast", FLCCIM, start, "https://www.flccim.com/events/a"),
+        event(4, "Legislative Update Breakfast.", FLCCIM, start, "https://www.flccim.com/events/b"),
+    ]
+    assert find_duplicates(same_start) == {4: 3}
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter, like a separate worker process. The database
+# path is relative, so each test gets its own app/data under tmp_path.
+WORKER = """
+import asyncio, sys
+from datetime import datetime
+from app.src.cache import cache_key
+from app.src.conditional import etag_for
+from app.src.db.database import AsyncSessionLocal, init_db, sync_changes
+from app.src.db.models import Event
+
+async def main():
+    init_db()
+    if sys.argv[1] == "write":
+        async with AsyncSessionLocal() as db:
+            db.add(Event(title="Mixer", start_datetime=datetime(2030, 1, 1)))
+            await db.commit()
+    await sync_changes()
+    print(etag_for(cache_key("event", 1)))
+
+asyncio.run(main())
+"""
+
+
+def worker_etag(cwd, action: str = "read") -> str:
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    result = subprocess.run(
+        [sys.executable, "-c", WORKER, action], cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_processes_agree_on_etag(tmp_path):
+    before = worker_etag(tmp_path)
+    assert worker_etag(tmp_path) == before
+
+    # The writer's tag after its own commit matches what another process
+    # computes from the change log
+    written = worker_etag(tmp_path, "write")
+    assert written != before
+    assert worker_etag(tmp_path) == written
@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.src.db.migrations import migrate_event_identity
+from app.src.db.models import Base
+
+TBRA = "https://thetbra.com/events/#!event/2025/{}/coffee-conversation"
+
+
+def test_identity_moves_to_canonical_link(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t.name != "events"])
+
+    columns = ", ".join(
+        f"{column.name} {column.type.compile(dialect=engine.dialect)}"
+        for column in Base.metadata.tables["events"].columns if column.name != "id"
+    )
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE events (id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT, {columns}, "
+            f"CONSTRAINT uix_event_identity UNIQUE (title, organizer_id, event_link))"
+        ))
+        conn.execute(text("INSERT INTO organizers (id, name) VALUES (1, 'TBRA'), (2, 'BOMA ORL')"))
+        conn.execute(text(
+            "INSERT INTO events (id, title, organizer_id, event_link, canonical_link, note, duplicate_of) VALUES "
+            # Different events on a single-page site, once collapsed to one link
+            f"(1, 'Coffee & Conversation', 1, '{TBRA.format('5/8')}', 'https://thetbra.com/events', NULL, NULL), "
+            f"(2, 'Coffee & Conversation', 1, '{TBRA.format('6/3')}', 'https://thetbra.com/events', NULL, NULL), "
+            # The same event stored twice
+            "(3, 'Luncheon', 2, 'https://www.bomaorlando.org/events/luncheon', NULL, NULL, NULL), "
+            "(4, 'Luncheon', 2, 'https://bomaorlando.org/events/luncheon/?utm_source=mail', NULL, 'Bring cards', NULL), "
+            "(5, 'Luncheon!', 2, 'https://example.org/luncheon', NULL, NULL, 4)"
+        ))
+        migrate_event_identity(conn)
+
+    with engine.begin() as conn:
+        rows = conn.execute(text("SELECT id, canonical_link, note, duplicate_of FROM events ORDER BY id")).all()
+        assert rows == [
+            (1, "https://thetbra.com/events#!event/2025/5/8/coffee-conversation", None, None),
+            (2, "https://thetbra.com/events#!event/2025/6/3/coffee-conversation", None, None),
+            (3, "https://bomaorlando.org/events/luncheon", "Bring cards", None),
+            (5, "https://example.org/luncheon", None, 3),
+        ]
+        assert conn.execute(text("SELECT event_id, op FROM event_changes ORDER BY seq")).all() == [
+            (3, "update"), (4, "delete"),
+        ]
+        constraints = inspect(conn).get_unique_constraints("events")
+        assert [c["column_names"] for c in constraints] == [["title", "organizer_id", "canonical_link"]]